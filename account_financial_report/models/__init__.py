@@ -1,4 +1,9 @@
 from . import account_group
 from . import account
+from . import account_age_report_configuration
+from . import account_monthly_balance
+from . import account_move
 from . import account_move_line
+from . import account_open_item_snapshot
+from . import account_partial_reconcile
 from . import ir_actions_report
@@ -0,0 +1,54 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo import fields, models
+
+
+class AccountAgeReportConfiguration(models.Model):
+    """Intervals of an aged partner balance.
+
+    Each line closes an interval at a number of days overdue. The report
+    always starts with the amounts not yet due and ends with the amounts
+    older than the last interval.
+    """
+
+    _name = "account.age.report.configuration"
+    _description = "Aged Partner Balance Intervals"
+
+    name = fields.Char(required=True)
+    company_id = fields.Many2one(
+        comodel_name="res.company", default=lambda self: self.env.company
+    )
+    line_ids = fields.One2many(
+        comodel_name="account.age.report.configuration.line",
+        inverse_name="configuration_id",
+        string="Intervals",
+    )
+
+
+class AccountAgeReportConfigurationLine(models.Model):
+    _name = "account.age.report.configuration.line"
+    _description = "Aged Partner Balance Interval"
+    _order = "days"
+
+    configuration_id = fields.Many2one(
+        comodel_name="account.age.report.configuration",
+        required=True,
+        ondelete="cascade",
+    )
+    name = fields.Char(required=True, translate=True)
+    days = fields.Integer(
+        required=True, help="Last day overdue of the interval, included."
+    )
+
+    _sql_constraints = [
+        (
+            "days_positive",
+            "CHECK(days > 0)",
+            "The days of an interval must be positive.",
+        ),
+        (
+            "days_unique",
+            "UNIQUE(configuration_id, days)",
+            "Two intervals of an aged partner balance cannot end the same day.",
+        ),
+    ]
@@ -0,0 +1,137 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo import api, fields, models
+
+
+class AccountMonthlyBalance(models.Model):
+    """Totals of the posted journal items per company, account, partner,
+    journal and month.
+
+    The table is maintained incrementally by the journal entries and items
+    themselves, so that the reports can read the balances of the closed
+    months from it instead of summing every historical journal item. Draft
+    entries are not stored: their items can still be edited, so the reports
+    always read them from account_move_line.
+
+    Each change inserts new rows holding the difference, so that concurrent
+    postings never update the same row, and the readers sum the rows of a
+    key. A scheduled job merges the rows of each key back into one.
+    """
+
+    _name = "account.monthly.balance"
+    _description = "Account Monthly Balance"
+    _log_access = False
+    _order = "month, account_id"
+
+    company_id = fields.Many2one(
+        comodel_name="res.company", required=True, readonly=True, index=True
+    )
+    company_currency_id = fields.Many2one(related="company_id.currency_id")
+    account_id = fields.Many2one(
+        comodel_name="account.account", required=True, readonly=True, index=True
+    )
+    partner_id = fields.Many2one(comodel_name="res.partner", readonly=True)
+    journal_id = fields.Many2one(
+        comodel_name="account.journal", required=True, readonly=True
+    )
+    month = fields.Date(required=True, readonly=True, index=True)
+    line_count = fields.Integer(readonly=True)
+    debit = fields.Monetary(currency_field="company_currency_id", readonly=True)
+    credit = fields.Monetary(currency_field="company_currency_id", readonly=True)
+    balance = fields.Monetary(currency_field="company_currency_id", readonly=True)
+    amount_currency = fields.Float(readonly=True)
+
+    def init(self):
+        self._cr.execute(
+            "SELECT indexname FROM pg_indexes WHERE indexname = %s",
+            ("account_monthly_balance_company_account_month_index",),
+        )
+        if not self._cr.fetchone():
+            self._cr.execute(
+                """
+            CREATE INDEX account_monthly_balance_company_account_month_index
+            ON account_monthly_balance (company_id, account_id, month)"""
+            )
+        self._cr.execute("SELECT 1 FROM account_monthly_balance LIMIT 1")
+        if not self._cr.fetchone():
+            self._rebuild()
+
+    @api.model
+    def _rebuild(self):
+        """Recompute the whole table from the posted journal items."""
+        self.env.flush_all()
+        self._cr.execute("DELETE FROM account_monthly_balance")
+        self._insert_move_lines("parent_state = 'posted'", [], 1)
+        self.invalidate_model()
+
+    @api.model
+    def _add_move_lines(self, move_lines, sign=1):
+        """Add (or subtract when ``sign`` is -1) the current amounts of the
+        given journal items to the monthly balances. Items of entries that
+        are not posted are ignored."""
+        if not move_lines:
+            return
+        move_lines.flush_recordset()
+        self._insert_move_lines(
+            "parent_state = 'posted' AND id IN %s", [tuple(move_lines.ids)], sign
+        )
+        self.invalidate_model()
+
+    @api.model
+    def _insert_move_lines(self, where_clause, where_params, sign):
+        query = """
+            INSERT INTO account_monthly_balance (
+                company_id, account_id, partner_id, journal_id, month,
+                line_count, debit, credit, balance, amount_currency
+            )
+            SELECT company_id, account_id, partner_id, journal_id,
+                date_trunc('month', date)::date,
+                %s * COUNT(*),
+                %s * SUM(debit),
+                %s * SUM(credit),
+                %s * SUM(balance),
+                %s * SUM(amount_currency)
+            FROM account_move_line
+            WHERE account_id IS NOT NULL AND {}
+            GROUP BY 1, 2, 3, 4, 5
+        """.format(
+            where_clause
+        )
+        self._cr.execute(query, [sign] * 5 + where_params)
+
+    @api.model
+    def _merge_rows(self):
+        """Replace the rows of each key by their sum, dropping the keys left
+        without journal items."""
+        self.flush_model()
+        self._cr.execute(
+            """
+            WITH duplicate AS (
+                SELECT company_id, account_id, COALESCE(partner_id, 0) AS partner_id,
+                    journal_id, month
+                FROM account_monthly_balance
+                GROUP BY 1, 2, 3, 4, 5
+                HAVING COUNT(*) > 1 OR SUM(line_count) = 0
+            ), deleted AS (
+                DELETE FROM account_monthly_balance amb
+                USING duplicate
+                WHERE amb.company_id = duplicate.company_id
+                    AND amb.account_id = duplicate.account_id
+                    AND COALESCE(amb.partner_id, 0) = duplicate.partner_id
+                    AND amb.journal_id = duplicate.journal_id
+                    AND amb.month = duplicate.month
+                RETURNING amb.*
+            )
+            INSERT INTO account_monthly_balance (
+                company_id, account_id, partner_id, journal_id, month,
+                line_count, debit, credit, balance, amount_currency
+            )
+            SELECT company_id, account_id, partner_id, journal_id, month,
+                SUM(line_count), SUM(debit), SUM(credit), SUM(balance),
+                SUM(amount_currency)
+            FROM deleted
+            GROUP BY 1, 2, 3, 4, 5
+            HAVING SUM(line_count) != 0
+            """
+        )
+        self.invalidate_model()
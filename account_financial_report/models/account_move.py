@@ -0,0 +1,32 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo import models
+
+# Fields of the journal entry whose change can move its items between
+# monthly balances
+MONTHLY_BALANCE_MOVE_FIELDS = {"state", "date", "journal_id", "company_id", "line_ids"}
+
+
+class AccountMove(models.Model):
+    _inherit = "account.move"
+
+    def write(self, vals):
+        if self.env.context.get("skip_monthly_balance") or not (
+            MONTHLY_BALANCE_MOVE_FIELDS & set(vals)
+        ):
+            return super().write(vals)
+        posted = self.filtered(lambda move: move.state == "posted")
+        # Only the posted entries are stored
+        if not posted and vals.get("state") != "posted":
+            return super().write(vals)
+        monthly_balance = self.env["account.monthly.balance"].sudo()
+        snapshot = self.env["account.open.item.snapshot"].sudo()
+        monthly_balance._add_move_lines(posted.line_ids, -1)
+        snapshot._invalidate_move_lines(posted.line_ids)
+        res = super(AccountMove, self.with_context(skip_monthly_balance=True)).write(
+            vals
+        )
+        posted = self.filtered(lambda move: move.state == "posted")
+        monthly_balance._add_move_lines(posted.line_ids)
+        snapshot._invalidate_move_lines(posted.line_ids)
+        return res
@@ -2,6 +2,31 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).-
 from odoo import api, fields, models
 
+# Fields of the journal item that are summed or grouped by in the monthly
+# balances
+MONTHLY_BALANCE_LINE_FIELDS = {
+    "account_id",
+    "partner_id",
+    "journal_id",
+    "company_id",
+    "date",
+    "debit",
+    "credit",
+    "balance",
+    "amount_currency",
+}
+
+# Fields of the journal item that change its residual in the open items
+# snapshots
+OPEN_ITEM_SNAPSHOT_LINE_FIELDS = {
+    "account_id",
+    "company_id",
+    "date",
+    "debit",
+    "credit",
+    "balance",
+}
+
 
 class AccountMoveLine(models.Model):
     _inherit = "account.move.line"
@@ -56,3 +81,44 @@ class AccountMoveLine(models.Model):
         if self.env.context.get("skip_search_count"):
             return 0
         return super().search_count(domain, limit=limit)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        lines = super().create(vals_list)
+        if not self.env.context.get("skip_monthly_balance"):
+            self.env["account.monthly.balance"].sudo()._add_move_lines(
+                lines.filtered(lambda line: line.parent_state == "posted")
+            )
+            self.env["account.open.item.snapshot"].sudo()._invalidate_move_lines(lines)
+        return lines
+
+    def write(self, vals):
+        if self.env.context.get("skip_monthly_balance"):
+            return super().write(vals)
+        update_balances = bool(MONTHLY_BALANCE_LINE_FIELDS & set(vals))
+        update_snapshots = bool(OPEN_ITEM_SNAPSHOT_LINE_FIELDS & set(vals))
+        if not (update_balances or update_snapshots):
+            return super().write(vals)
+        posted = self.filtered(lambda line: line.parent_state == "posted")
+        if not posted:
+            return super().write(vals)
+        monthly_balance = self.env["account.monthly.balance"].sudo()
+        snapshot = self.env["account.open.item.snapshot"].sudo()
+        if update_balances:
+            monthly_balance._add_move_lines(posted, -1)
+        if update_snapshots:
+            snapshot._invalidate_move_lines(posted)
+        res = super().write(vals)
+        if update_balances:
+            monthly_balance._add_move_lines(posted)
+        if update_snapshots:
+            snapshot._invalidate_move_lines(posted)
+        return res
+
+    def unlink(self):
+        if not self.env.context.get("skip_monthly_balance"):
+            self.env["account.monthly.balance"].sudo()._add_move_lines(
+                self.filtered(lambda line: line.parent_state == "posted"), -1
+            )
+            self.env["account.open.item.snapshot"].sudo()._invalidate_move_lines(self)
+        return super().unlink()
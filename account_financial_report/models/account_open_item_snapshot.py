@@ -0,0 +1,163 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from dateutil.relativedelta import relativedelta
+
+from odoo import api, fields, models
+
+
+class AccountOpenItemSnapshot(models.Model):
+    """Residuals of the posted journal items open at a month end.
+
+    The open items and aged partner balance reports at a past date rebuild
+    the residuals from the partial reconciliations made since. A scheduled
+    job stores them for the last month ends, the number of months being
+    set by ``account_financial_report.open_items_snapshot_months`` (no
+    snapshot by default), and the reports read them instead. A snapshot is
+    deleted as soon as a reconciliation or a posted journal item dated on
+    or before it changes, and recreated by the next run of the job. Nothing
+    is invalidated nor read while no month is set.
+    """
+
+    _name = "account.open.item.snapshot"
+    _description = "Open Items Snapshot"
+    _log_access = False
+    _order = "date desc"
+
+    company_id = fields.Many2one(
+        comodel_name="res.company", required=True, readonly=True, index=True
+    )
+    date = fields.Date(required=True, readonly=True)
+    line_ids = fields.One2many(
+        comodel_name="account.open.item.snapshot.line",
+        inverse_name="snapshot_id",
+        readonly=True,
+    )
+
+    _sql_constraints = [
+        (
+            "company_date_uniq",
+            "unique(company_id, date)",
+            "There can be only one snapshot per company and date.",
+        )
+    ]
+
+    @api.model
+    def _get_snapshot_months(self):
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_financial_report.open_items_snapshot_months", 0)
+        )
+
+    @api.model
+    def _get_snapshot_dates(self, today=None):
+        """Return the month ends to keep a snapshot of, most recent first."""
+        month_start = (today or fields.Date.context_today(self)).replace(day=1)
+        return [
+            month_start - relativedelta(months=month, days=1)
+            for month in range(self._get_snapshot_months())
+        ]
+
+    @api.model
+    def _get_snapshot(self, company_id, date):
+        if not self._get_snapshot_months():
+            return self.browse()
+        return self.search(
+            [("company_id", "=", company_id), ("date", "=", date)], limit=1
+        )
+
+    @api.model
+    def _create_snapshot(self, company, date):
+        """Store the residuals at ``date`` of the open items of the
+        reconcilable accounts of the company."""
+        accounts = self.env["account.account"].search(
+            [("company_id", "=", company.id), ("reconcile", "=", True)]
+        )
+        # Built before the snapshot exists, as it would be read from it then
+        open_query, open_params = self.env[
+            "report.account_financial_report.abstract_report"
+        ]._get_open_move_lines_query(company.id, accounts.ids, [], date, False, True)
+        snapshot = self.create({"company_id": company.id, "date": date})
+        self.flush_model()
+        self._cr.execute(
+            """
+            INSERT INTO account_open_item_snapshot_line (
+                snapshot_id, move_line_id, residual
+            )
+            SELECT %s, id, residual
+            FROM ({open_query}) open_move_line
+            """.format(
+                open_query=open_query
+            ),
+            [snapshot.id] + open_params,
+        )
+        snapshot.invalidate_recordset(["line_ids"])
+        return snapshot
+
+    @api.model
+    def _cron_update_snapshots(self):
+        """Create the missing snapshots of the month ends to keep, and
+        delete the older ones."""
+        self = self.sudo()
+        dates = self._get_snapshot_dates()
+        self.search([("date", "not in", dates)]).unlink()
+        for company in self.env["res.company"].search([]):
+            existing = set(
+                self.search([("company_id", "=", company.id)]).mapped("date")
+            )
+            for date in dates:
+                if date not in existing:
+                    self._create_snapshot(company, date)
+
+    @api.model
+    def _invalidate(self, company_dates):
+        """Delete the snapshots dated on or after the date of their company
+        in the ``{company_id: date}`` dict, with one statement."""
+        if not company_dates:
+            return
+        self.flush_model()
+        self._cr.execute(
+            "DELETE FROM account_open_item_snapshot WHERE {}".format(
+                " OR ".join(["(company_id = %s AND date >= %s)"] * len(company_dates))
+            ),
+            [value for company_date in company_dates.items() for value in company_date],
+        )
+        if self._cr.rowcount:
+            self.invalidate_model()
+            self.env["account.open.item.snapshot.line"].invalidate_model()
+
+    @api.model
+    def _invalidate_move_lines(self, move_lines):
+        """Delete the snapshots that may include the given posted journal
+        items."""
+        if not self._get_snapshot_months():
+            return
+        company_dates = {}
+        for line in move_lines.filtered(lambda ml: ml.parent_state == "posted"):
+            company_id = line.company_id.id
+            if company_id not in company_dates or line.date < company_dates[company_id]:
+                company_dates[company_id] = line.date
+        self._invalidate(company_dates)
+
+
+class AccountOpenItemSnapshotLine(models.Model):
+    _name = "account.open.item.snapshot.line"
+    _description = "Open Items Snapshot Line"
+    _log_access = False
+
+    snapshot_id = fields.Many2one(
+        comodel_name="account.open.item.snapshot",
+        required=True,
+        readonly=True,
+        index=True,
+        ondelete="cascade",
+    )
+    move_line_id = fields.Many2one(
+        comodel_name="account.move.line",
+        required=True,
+        readonly=True,
+        index=True,
+        ondelete="cascade",
+    )
+    company_currency_id = fields.Many2one(related="snapshot_id.company_id.currency_id")
+    residual = fields.Monetary(currency_field="company_currency_id", readonly=True)
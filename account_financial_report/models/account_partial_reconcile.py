@@ -0,0 +1,32 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+from odoo import api, models
+
+
+class AccountPartialReconcile(models.Model):
+    _inherit = "account.partial.reconcile"
+
+    def _invalidate_open_item_snapshots(self):
+        """A reconciliation changes the residuals from its date on."""
+        snapshot_model = self.env["account.open.item.snapshot"].sudo()
+        if not snapshot_model._get_snapshot_months():
+            return
+        company_dates = {}
+        for partial in self:
+            company_id = partial.company_id.id
+            if (
+                company_id not in company_dates
+                or partial.max_date < company_dates[company_id]
+            ):
+                company_dates[company_id] = partial.max_date
+        snapshot_model._invalidate(company_dates)
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        partials = super().create(vals_list)
+        partials._invalidate_open_item_snapshots()
+        return partials
+
+    def unlink(self):
+        self._invalidate_open_item_snapshots()
+        return super().unlink()
@@ -1,7 +1,96 @@
 # Copyright 2020 ForgeFlow S.L. (https://www.forgeflow.com)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
-from odoo import api, models
+import uuid
+from array import array
+from contextlib import contextmanager
+from datetime import date
+
+from odoo import api, fields, models
+from odoo.osv import expression
+
+# Key of the cursor cache of the open move lines shared by the reports
+# generated within _open_items_cache
+OPEN_ITEMS_CACHE = "account_financial_report.open_items"
+
+
+class MoveLineStore:
+    """Columnar container for the move lines read by the report engines.
+
+    The values of each field are kept in one column: an ``array`` of
+    doubles for float fields, an ``array`` of integers for integer and
+    many2one fields (0 standing for an empty value) and a list for the
+    other fields, whose equal values are shared. The display names of
+    many2one values are kept once per record in ``names`` instead of once
+    per line, and ``index`` maps each move line id to its position.
+    """
+
+    __slots__ = ("columns", "names", "index", "_interned")
+
+    def __init__(self, model, fields):
+        self.columns = {}
+        self.names = {}
+        self.index = {}
+        self._interned = {}
+        for fname in fields:
+            field = model._fields.get(fname)
+            ftype = field.type if field else False
+            if ftype in ("integer", "many2one"):
+                self.columns[fname] = array("q")
+                if ftype == "many2one":
+                    self.names[fname] = {}
+            elif ftype in ("float", "monetary"):
+                self.columns[fname] = array("d")
+            else:
+                self.columns[fname] = []
+                self._interned[fname] = {}
+
+    def __len__(self):
+        return len(self.columns["id"])
+
+    def __iter__(self):
+        for pos in range(len(self)):
+            yield self.row(pos)
+
+    def _intern(self, fname, value):
+        if isinstance(value, list):
+            value = tuple(value)
+        try:
+            return self._interned[fname].setdefault(value, value)
+        except TypeError:
+            return value
+
+    def append(self, values):
+        """Append a move line given as a ``read`` dict."""
+        self.index[values["id"]] = len(self)
+        for fname, column in self.columns.items():
+            value = values[fname]
+            if fname in self.names:
+                if value:
+                    self.names[fname].setdefault(value[0], value[1])
+                    value = value[0]
+                column.append(value or 0)
+            elif isinstance(column, array):
+                column.append(value or 0)
+            else:
+                column.append(self._intern(fname, value))
+
+    def extend(self, move_lines):
+        for values in move_lines:
+            self.append(values)
+
+    def get(self, fname, pos):
+        """Value of a field of a line in ``read`` format."""
+        value = self.columns[fname][pos]
+        if fname in self.names:
+            return (value, self.names[fname][value]) if value else False
+        if isinstance(value, tuple):
+            return list(value)
+        return value
+
+    def row(self, pos):
+        """Line at the given position as a ``read`` dict."""
+        return {fname: self.get(fname, pos) for fname in self.columns}
 
 
 class AgedPartnerBalanceReport(models.AbstractModel):
@@ -54,6 +143,32 @@ class AgedPartnerBalanceReport(models.AbstractModel):
             domain += [("move_id.state", "in", ["posted", "draft"])]
         return domain
 
+    def _get_account_partial_reconciled(self, company_id, date_at_object):
+        """Return the partial reconciliations made after ``date_at_object``
+        and their amounts summed by debit and by credit line.
+
+        Kept for compatibility, the reports compute the residuals at the
+        date in ``_get_open_move_lines_query``.
+        """
+        domain = [("max_date", ">", date_at_object), ("company_id", "=", company_id)]
+        fields = ["debit_move_id", "credit_move_id", "amount"]
+        accounts_partial_reconcile = self.env["account.partial.reconcile"].search_read(
+            domain=domain, fields=fields
+        )
+        debit_amount = {}
+        credit_amount = {}
+        for account_partial_reconcile_data in accounts_partial_reconcile:
+            debit_move_id = account_partial_reconcile_data["debit_move_id"][0]
+            credit_move_id = account_partial_reconcile_data["credit_move_id"][0]
+            debit_amount.setdefault(debit_move_id, 0.0)
+            debit_amount[debit_move_id] += account_partial_reconcile_data["amount"]
+            credit_amount.setdefault(credit_move_id, 0.0)
+            credit_amount[credit_move_id] += account_partial_reconcile_data["amount"]
+            account_partial_reconcile_data.update(
+                {"debit_move_id": debit_move_id, "credit_move_id": credit_move_id}
+            )
+        return accounts_partial_reconcile, debit_amount, credit_amount
+
     def _recalculate_move_lines(
         self,
         move_lines,
@@ -67,30 +182,219 @@ class AgedPartnerBalanceReport(models.AbstractModel):
         partner_ids,
         only_posted_moves,
     ):
-        debit_ids = set(debit_ids)
-        credit_ids = set(credit_ids)
-        in_credit_but_not_in_debit = credit_ids - debit_ids
-        reconciled_ids = list(debit_ids) + list(in_credit_but_not_in_debit)
-        reconciled_ids = set(reconciled_ids)
-        ml_ids = set(ml_ids)
-        new_ml_ids = reconciled_ids - ml_ids
-        new_ml_ids = list(new_ml_ids)
+        """Add the lines reconciled after the date to the ``read`` dicts of
+        the open move lines and set back their reconciled amounts.
+
+        Kept for compatibility, the reports compute the residuals at the
+        date in ``_get_open_move_lines_query``.
+        """
+        new_ml_ids = list((set(debit_ids) | set(credit_ids)) - set(ml_ids))
         new_domain = self._get_new_move_lines_domain(
             new_ml_ids, account_ids, company_id, partner_ids, only_posted_moves
         )
-        ml_fields = self._get_ml_fields()
-        new_move_lines = self.env["account.move.line"].search_read(
-            domain=new_domain, fields=ml_fields
+        move_lines = move_lines + self.env["account.move.line"].search_read(
+            domain=new_domain, fields=self._get_ml_fields()
         )
-        move_lines = move_lines + new_move_lines
         for move_line in move_lines:
             ml_id = move_line["id"]
-            if ml_id in debit_ids:
+            if ml_id in debit_amount:
                 move_line["amount_residual"] += debit_amount[ml_id]
-            if ml_id in credit_ids:
+            if ml_id in credit_amount:
                 move_line["amount_residual"] -= credit_amount[ml_id]
         return move_lines
 
+    def _get_open_move_lines_query(
+        self,
+        company_id,
+        account_ids,
+        partner_ids,
+        date_at_object,
+        date_from,
+        only_posted_moves,
+    ):
+        """Return the query and parameters selecting the ``id`` and the
+        ``residual`` at ``date_at_object`` of the move lines open at that
+        date.
+
+        These are the lines not reconciled yet and, at a past date, the
+        lines with partial reconciliations made later, which may have fully
+        reconciled them since. The latter are selected with
+        ``_get_new_move_lines_domain``, which does not filter on
+        ``date_from``. The residual at a past date is the current residual
+        plus the amounts of these partial reconciliations, added on debit
+        lines and subtracted on credit lines. The residuals are read from the
+        open items snapshot of the date instead, when there is one for the
+        posted items of the accounts.
+        """
+        if only_posted_moves and not date_from:
+            snapshot = (
+                self.env["account.open.item.snapshot"]
+                .sudo()
+                ._get_snapshot(company_id, date_at_object)
+            )
+            accounts = self.env["account.account"].browse(account_ids)
+            if snapshot and accounts and all(accounts.mapped("reconcile")):
+                return self._get_open_move_lines_snapshot_query(
+                    snapshot, account_ids, partner_ids
+                )
+        line_model = self.env["account.move.line"]
+        line_model.flush_model(["amount_residual", "reconciled", "date"])
+        self.env["account.partial.reconcile"].flush_model(
+            ["debit_move_id", "credit_move_id", "amount", "max_date", "company_id"]
+        )
+        domains = [
+            self._get_move_lines_domain_not_reconciled(
+                company_id, account_ids, partner_ids, only_posted_moves, date_from
+            )
+        ]
+        if date_at_object < date.today():
+            reconciled_after = line_model._search(
+                expression.OR(
+                    [
+                        [("matched_debit_ids.max_date", ">", date_at_object)],
+                        [("matched_credit_ids.max_date", ">", date_at_object)],
+                    ]
+                )
+            )
+            domains.append(
+                self._get_new_move_lines_domain(
+                    reconciled_after,
+                    account_ids,
+                    company_id,
+                    partner_ids,
+                    only_posted_moves,
+                )
+            )
+            residual = """
+                "account_move_line".amount_residual + COALESCE((
+                    SELECT SUM(CASE
+                        WHEN apr.debit_move_id = "account_move_line".id
+                        THEN apr.amount ELSE -apr.amount
+                    END)
+                    FROM account_partial_reconcile apr
+                    WHERE apr.max_date > %s AND (
+                        apr.debit_move_id = "account_move_line".id
+                        OR apr.credit_move_id = "account_move_line".id
+                    )
+                ), 0)"""
+            residual_params = [date_at_object]
+        else:
+            residual = '"account_move_line".amount_residual'
+            residual_params = []
+        selects = []
+        params = []
+        for domain in domains:
+            from_clause, where_clause, where_params = line_model._search(
+                domain + [("date", "<=", date_at_object)]
+            ).get_sql()
+            selects.append(
+                """
+                SELECT "account_move_line".id AS id, {residual} AS residual
+                FROM {from_clause}
+                WHERE {where_clause}
+                """.format(
+                    residual=residual,
+                    from_clause=from_clause,
+                    where_clause=where_clause,
+                )
+            )
+            params += residual_params + where_params
+        # A line in both sets has the same residual in both, UNION keeps one
+        query = """
+            SELECT id, residual
+            FROM ({selects}) open_move_line
+            WHERE ROUND(residual, 2) != 0
+        """.format(
+            selects="UNION".join(selects)
+        )
+        return query, params
+
+    def _get_open_move_lines_snapshot_query(self, snapshot, account_ids, partner_ids):
+        """Return the query and parameters selecting the ``id`` and the
+        ``residual`` of the move lines of the accounts (and partners) open at
+        the date of the snapshot."""
+        self.env["account.open.item.snapshot.line"].flush_model()
+        self.env["account.move.line"].flush_model(["account_id", "partner_id"])
+        query = """
+            SELECT aoisl.move_line_id AS id, aoisl.residual AS residual
+            FROM account_open_item_snapshot_line aoisl
+            JOIN account_move_line snapshot_aml
+                ON snapshot_aml.id = aoisl.move_line_id
+            WHERE aoisl.snapshot_id = %s AND snapshot_aml.account_id IN %s
+        """
+        params = [snapshot.id, tuple(account_ids)]
+        if partner_ids:
+            query += " AND snapshot_aml.partner_id IN %s"
+            params.append(tuple(partner_ids))
+        return query, params
+
+    @contextmanager
+    def _open_items_cache(self):
+        """Share the open move lines of ``_get_open_move_lines`` between the
+        reports generated in the block, and forget them when it ends.
+
+        The report entry points open it, so that a batch generating several
+        reports or outputs within an outer block reads the open move lines
+        once. The move lines must not change within the block.
+        """
+        if OPEN_ITEMS_CACHE in self.env.cr.cache:
+            yield
+            return
+        self.env.cr.cache[OPEN_ITEMS_CACHE] = {}
+        try:
+            yield
+        finally:
+            self.env.cr.cache.pop(OPEN_ITEMS_CACHE, None)
+
+    def _get_open_move_lines(
+        self,
+        company_id,
+        account_ids,
+        partner_ids,
+        date_at_object,
+        date_from,
+        only_posted_moves,
+    ):
+        """Return the move lines of the accounts (and partners) that are not
+        reconciled at ``date_at_object``, with their residual at that date,
+        as a ``MoveLineStore``.
+
+        This is the dataset of the open items and aged partner balance
+        reports. Within ``_open_items_cache``, the result is kept and reused
+        by all the reports and outputs generated in the block.
+        """
+        ml_fields = self._get_ml_fields()
+        cache = self.env.cr.cache.get(OPEN_ITEMS_CACHE)
+        key = (
+            company_id,
+            tuple(account_ids),
+            tuple(partner_ids or ()),
+            date_at_object,
+            date_from or False,
+            only_posted_moves,
+            tuple(ml_fields),
+        )
+        if cache is not None and key in cache:
+            return cache[key]
+        move_lines = MoveLineStore(self.env["account.move.line"], ml_fields)
+        if account_ids:
+            query, params = self._get_open_move_lines_query(
+                company_id,
+                account_ids,
+                partner_ids,
+                date_at_object,
+                date_from,
+                only_posted_moves,
+            )
+            for move_line in self._read_move_line_rows(
+                query, params, ml_fields, ["residual"]
+            ):
+                move_line["amount_residual"] = move_line.pop("residual")
+                move_lines.append(move_line)
+        if cache is not None:
+            cache[key] = move_lines
+        return move_lines
+
     def _get_accounts_data(self, accounts_ids):
         accounts = self.env["account.account"].browse(accounts_ids)
         accounts_data = {}
@@ -118,6 +422,143 @@ class AgedPartnerBalanceReport(models.AbstractModel):
             journals_data.update({journal.id: {"id": journal.id, "code": journal.code}})
         return journals_data
 
+    def _get_ml_chunk_size(self):
+        return int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_financial_report.move_line_chunk_size", 10000)
+        )
+
+    def _iter_move_lines(self, domain, fields, order=None, extra_select=None):
+        """Yield the move lines matching the domain as ``read`` dicts.
+
+        The ids are streamed through a named (server-side) cursor and the
+        values are read in chunks, so the memory used while iterating depends
+        on the chunk size and not on the number of lines selected.
+        ``extra_select`` maps keys added to each dict to the SQL expressions
+        computing them in the same query.
+        """
+        extra_select = extra_select or {}
+        query_str, params = (
+            self.env["account.move.line"]
+            ._search(domain, order=order)
+            .select('"account_move_line".id', *extra_select.values())
+        )
+        yield from self._read_move_line_rows(
+            query_str, params, fields, list(extra_select.keys())
+        )
+
+    def _read_move_line_rows(self, query_str, params, fields, extra_keys=()):
+        """Yield as ``read`` dicts the move lines whose ids are the first
+        column of the rows of the query, by chunks. The other columns are
+        added to the dicts under ``extra_keys``."""
+        line_model = self.env["account.move.line"]
+        for rows in self._fetch_by_chunks(query_str, params):
+            move_lines = line_model.browse([row[0] for row in rows])
+            for move_line, row in zip(move_lines.read(fields), rows):
+                move_line.update(zip(extra_keys, row[1:]))
+                yield move_line
+            move_lines.invalidate_recordset()
+
+    def _iter_move_line_rows(self, domain, columns, order=None):
+        """Yield the move lines matching the domain by chunks, as lists of
+        dicts holding the raw values of the given stored columns.
+
+        The values are projected by the query itself: many2one columns hold
+        ids (or None) and no record is loaded in the ORM cache.
+        """
+        line_model = self.env["account.move.line"]
+        line_model.flush_model(columns)
+        query_str, params = line_model._search(domain, order=order).select(
+            *['"account_move_line"."%s"' % column for column in columns]
+        )
+        for rows in self._fetch_by_chunks(query_str, params):
+            yield [dict(zip(columns, row)) for row in rows]
+
+    def _fetch_by_chunks(self, query_str, params):
+        """Execute the query in a named (server-side) cursor and yield its
+        rows by lists of at most the move line chunk size."""
+        chunk_size = self._get_ml_chunk_size()
+        cursor_name = "afr_move_lines_%s" % uuid.uuid4().hex
+        with self.env.cr._cnx.cursor(cursor_name) as ml_cr:
+            ml_cr.itersize = chunk_size
+            ml_cr.execute(query_str, params)
+            while True:
+                rows = ml_cr.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield rows
+
+    def _get_move_lines_store(self, domain, fields, order=None):
+        """Return the move lines matching the domain in a ``MoveLineStore``."""
+        move_lines = MoveLineStore(self.env["account.move.line"], fields)
+        move_lines.extend(self._iter_move_lines(domain, fields, order=order))
+        return move_lines
+
+    @api.model
+    def _get_monthly_balance_cutoff(self, date_from, fy_start_date):
+        """Return the first day of the month of ``date_from``: the posted
+        journal items dated before it can be read from the monthly balances.
+        Return False when the fiscal year does not start on the first day of
+        a month, as its P&L balances could then not be split by month."""
+        fy_start_date = fields.Date.to_date(fy_start_date)
+        if not fy_start_date or fy_start_date.day != 1:
+            return False
+        return fields.Date.to_date(date_from).replace(day=1)
+
+    @api.model
+    def _get_monthly_balance_tail_domain(self, cutoff):
+        """Domain of the journal items not covered by the monthly balances
+        before ``cutoff``."""
+        return expression.OR(
+            [[("date", ">=", cutoff)], [("parent_state", "!=", "posted")]]
+        )
+
+    @api.model
+    def _get_monthly_balances(
+        self,
+        company_id,
+        account_ids,
+        month_to,
+        month_from=False,
+        journal_ids=None,
+        partner_ids=None,
+        groupby=("account_id",),
+    ):
+        """Return the totals of the posted journal items of the accounts dated
+        from ``month_from`` (included) to ``month_to`` (excluded), grouped by
+        ``groupby``, as read from the monthly balances."""
+        if not account_ids:
+            return []
+        where = ["company_id = %s", "account_id IN %s", "month < %s"]
+        params = [company_id, tuple(account_ids), month_to]
+        if month_from:
+            where.append("month >= %s")
+            params.append(month_from)
+        if journal_ids:
+            where.append("journal_id IN %s")
+            params.append(tuple(journal_ids))
+        if partner_ids:
+            where.append("partner_id IN %s")
+            params.append(tuple(partner_ids))
+        self.env["account.monthly.balance"].flush_model()
+        query = """
+            SELECT {groupby},
+                SUM(line_count) AS line_count,
+                SUM(debit) AS debit,
+                SUM(credit) AS credit,
+                SUM(balance) AS balance,
+                SUM(amount_currency) AS amount_currency
+            FROM account_monthly_balance
+            WHERE {where}
+            GROUP BY {groupby}
+            HAVING SUM(line_count) > 0
+        """.format(
+            groupby=", ".join(groupby), where=" AND ".join(where)
+        )
+        self.env.cr.execute(query, params)
+        return self.env.cr.dictfetchall()
+
     def _get_ml_fields(self):
         return self.COMMON_ML_FIELDS + [
             "amount_residual",
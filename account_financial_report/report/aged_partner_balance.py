@@ -2,11 +2,10 @@
 # Copyright 2020 ForgeFlow S.L. (https://www.forgeflow.com)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
-import operator
-from datetime import date, datetime, timedelta
+from bisect import bisect_left
+from datetime import datetime
 
-from odoo import api, models
-from odoo.tools import float_is_zero
+from odoo import _, api, models
 
 
 class AgedPartnerBalanceReport(models.AbstractModel):
@@ -19,12 +18,8 @@ class AgedPartnerBalanceReport(models.AbstractModel):
         ag_pb_data[acc_id] = {}
         ag_pb_data[acc_id]["id"] = acc_id
         ag_pb_data[acc_id]["residual"] = 0.0
-        ag_pb_data[acc_id]["current"] = 0.0
-        ag_pb_data[acc_id]["30_days"] = 0.0
-        ag_pb_data[acc_id]["60_days"] = 0.0
-        ag_pb_data[acc_id]["90_days"] = 0.0
-        ag_pb_data[acc_id]["120_days"] = 0.0
-        ag_pb_data[acc_id]["older"] = 0.0
+        for name in self._get_aging_buckets()[0]:
+            ag_pb_data[acc_id][name] = 0.0
         return ag_pb_data
 
     @api.model
@@ -32,63 +27,185 @@ class AgedPartnerBalanceReport(models.AbstractModel):
         ag_pb_data[acc_id][prt_id] = {}
         ag_pb_data[acc_id][prt_id]["id"] = acc_id
         ag_pb_data[acc_id][prt_id]["residual"] = 0.0
-        ag_pb_data[acc_id][prt_id]["current"] = 0.0
-        ag_pb_data[acc_id][prt_id]["30_days"] = 0.0
-        ag_pb_data[acc_id][prt_id]["60_days"] = 0.0
-        ag_pb_data[acc_id][prt_id]["90_days"] = 0.0
-        ag_pb_data[acc_id][prt_id]["120_days"] = 0.0
-        ag_pb_data[acc_id][prt_id]["older"] = 0.0
+        for name in self._get_aging_buckets()[0]:
+            ag_pb_data[acc_id][prt_id][name] = 0.0
         ag_pb_data[acc_id][prt_id]["move_lines"] = []
         return ag_pb_data
 
     @api.model
-    def _calculate_amounts(
-        self, ag_pb_data, acc_id, prt_id, residual, due_date, date_at_object
-    ):
-        ag_pb_data[acc_id]["residual"] += residual
-        ag_pb_data[acc_id][prt_id]["residual"] += residual
-        today = date_at_object
-        if not due_date or today <= due_date:
-            ag_pb_data[acc_id]["current"] += residual
-            ag_pb_data[acc_id][prt_id]["current"] += residual
-        elif today <= due_date + timedelta(days=30):
-            ag_pb_data[acc_id]["30_days"] += residual
-            ag_pb_data[acc_id][prt_id]["30_days"] += residual
-        elif today <= due_date + timedelta(days=60):
-            ag_pb_data[acc_id]["60_days"] += residual
-            ag_pb_data[acc_id][prt_id]["60_days"] += residual
-        elif today <= due_date + timedelta(days=90):
-            ag_pb_data[acc_id]["90_days"] += residual
-            ag_pb_data[acc_id][prt_id]["90_days"] += residual
-        elif today <= due_date + timedelta(days=120):
-            ag_pb_data[acc_id]["120_days"] += residual
-            ag_pb_data[acc_id][prt_id]["120_days"] += residual
-        else:
-            ag_pb_data[acc_id]["older"] += residual
-            ag_pb_data[acc_id][prt_id]["older"] += residual
-        return ag_pb_data
+    def _get_aging_config(self):
+        return self.env["account.age.report.configuration"].browse(
+            self.env.context.get("age_partner_config_id")
+        )
 
-    def _get_account_partial_reconciled(self, company_id, date_at_object):
-        domain = [("max_date", ">", date_at_object), ("company_id", "=", company_id)]
-        fields = ["debit_move_id", "credit_move_id", "amount"]
-        accounts_partial_reconcile = self.env["account.partial.reconcile"].search_read(
-            domain=domain, fields=fields
+    @api.model
+    def _get_aging_buckets(self):
+        """Return the names of the aging buckets and their upper limits, in
+        days overdue. The last bucket has no limit.
+
+        The buckets between current and older are the intervals of the
+        configuration given by ``age_partner_config_id`` in the context,
+        30, 60, 90 and 120 days by default.
+        """
+        config = self._get_aging_config()
+        days = config.line_ids.mapped("days") if config else [30, 60, 90, 120]
+        return (
+            ["current"] + ["%s_days" % day for day in days] + ["older"],
+            [0] + days,
         )
-        debit_amount = {}
-        credit_amount = {}
-        for account_partial_reconcile_data in accounts_partial_reconcile:
-            debit_move_id = account_partial_reconcile_data["debit_move_id"][0]
-            credit_move_id = account_partial_reconcile_data["credit_move_id"][0]
-            if debit_move_id not in debit_amount.keys():
-                debit_amount[debit_move_id] = 0.0
-            debit_amount[debit_move_id] += account_partial_reconcile_data["amount"]
-            if credit_move_id not in credit_amount.keys():
-                credit_amount[credit_move_id] = 0.0
-            credit_amount[credit_move_id] += account_partial_reconcile_data["amount"]
-            account_partial_reconcile_data.update(
-                {"debit_move_id": debit_move_id, "credit_move_id": credit_move_id}
+
+    @api.model
+    def _get_aging_columns(self):
+        """Return the aging buckets as dicts with the name of their amounts,
+        and their labels in the report and in the move line details."""
+        names, limits = self._get_aging_buckets()
+        config_labels = self._get_aging_config().line_ids.mapped("name")
+        columns = [{"field": "current", "label": _("Not due"), "detail": _("Current")}]
+        for index, day in enumerate(limits[1:]):
+            if config_labels:
+                label = detail = config_labels[index]
+            else:
+                label = _("%(from)s - %(to)s d.") % {
+                    "from": limits[index] + 1,
+                    "to": day,
+                }
+                detail = _("Age ≤ %s d.") % day
+            columns.append(
+                {"field": names[index + 1], "label": label, "detail": detail}
             )
-        return accounts_partial_reconcile, debit_amount, credit_amount
+        columns.append(
+            {"field": "older", "label": _("> %s d.") % limits[-1], "detail": _("Older")}
+        )
+        return columns
+
+    @api.model
+    def _get_aging_bucket_indexes(self, due_dates, date_at_object):
+        """Return the index of the aging bucket of each due date, found by a
+        binary search of its days overdue among the bucket limits. Lines
+        without due date are current."""
+        limits = self._get_aging_buckets()[1]
+        at_ordinal = date_at_object.toordinal()
+        return [
+            bisect_left(limits, at_ordinal - due_date.toordinal()) if due_date else 0
+            for due_date in due_dates
+        ]
+
+    @api.model
+    def _sum_aging_buckets(self, keys, bucket_indexes, residuals):
+        """Return the residuals summed by key and aging bucket, as a dict
+        mapping each key to the list of the totals of the buckets."""
+        bucket_count = len(self._get_aging_buckets()[0])
+        totals = {}
+        for key, bucket_index, residual in zip(keys, bucket_indexes, residuals):
+            key_totals = totals.get(key)
+            if key_totals is None:
+                key_totals = totals[key] = [0.0] * bucket_count
+            key_totals[bucket_index] += residual
+        return totals
+
+    @api.model
+    def _calculate_amounts(self, ag_pb_data, move_lines, date_at_object):
+        """Age the open move lines of the store and add their residuals to
+        the account and partner totals."""
+        columns = move_lines.columns
+        bucket_indexes = self._get_aging_bucket_indexes(
+            columns["date_maturity"], date_at_object
+        )
+        residuals = columns["amount_residual"]
+        acc_ids = columns["account_id"]
+        prt_ids = columns["partner_id"]
+        names = self._get_aging_buckets()[0]
+        for acc_id, totals in self._sum_aging_buckets(
+            acc_ids, bucket_indexes, residuals
+        ).items():
+            ag_pb_data[acc_id].update(zip(names, totals))
+            ag_pb_data[acc_id]["residual"] = sum(totals)
+        for (acc_id, prt_id), totals in self._sum_aging_buckets(
+            zip(acc_ids, prt_ids), bucket_indexes, residuals
+        ).items():
+            ag_pb_data[acc_id][prt_id].update(zip(names, totals))
+            ag_pb_data[acc_id][prt_id]["residual"] = sum(totals)
+        return ag_pb_data
+
+    def _get_aging_totals_data(
+        self,
+        company_id,
+        account_ids,
+        partner_ids,
+        date_at_object,
+        date_from,
+        only_posted_moves,
+    ):
+        """Return the aged totals by account and partner, with the residual
+        at ``date_at_object`` and the aging bucket of each open line computed
+        and summed by the database, no move line is read.
+        """
+        open_query, open_params = self._get_open_move_lines_query(
+            company_id,
+            account_ids,
+            partner_ids,
+            date_at_object,
+            date_from,
+            only_posted_moves,
+        )
+        self.env["account.move.line"].flush_model(
+            ["account_id", "partner_id", "date_maturity"]
+        )
+        names, limits = self._get_aging_buckets()
+        # width_bucket returns the number of thresholds lower or equal to the
+        # days overdue, the first day of each bucket after current
+        query = """
+            SELECT aml.account_id,
+                COALESCE(aml.partner_id, 0),
+                COALESCE(width_bucket(%s::date - aml.date_maturity, %s), 0),
+                SUM(open_move_line.residual)
+            FROM ({open_query}) open_move_line
+            JOIN account_move_line aml ON aml.id = open_move_line.id
+            GROUP BY 1, 2, 3
+        """.format(
+            open_query=open_query
+        )
+        self.env.cr.execute(
+            query, [date_at_object, [limit + 1 for limit in limits]] + open_params
+        )
+        rows = self.env.cr.fetchall()
+        partners_data = {0: {"id": 0, "name": ""}}
+        partners = self.env["res.partner"].browse({row[1] for row in rows} - {0})
+        for prt_id, prt_name in partners.name_get():
+            partners_data[prt_id] = {"id": prt_id, "name": prt_name}
+        ag_pb_data = {}
+        for acc_id, prt_id, bucket_index, residual in rows:
+            if acc_id not in ag_pb_data:
+                ag_pb_data = self._initialize_account(ag_pb_data, acc_id)
+            if prt_id not in ag_pb_data[acc_id]:
+                ag_pb_data = self._initialize_partner(ag_pb_data, acc_id, prt_id)
+            for values in (ag_pb_data[acc_id], ag_pb_data[acc_id][prt_id]):
+                values["residual"] += residual
+                values[names[bucket_index]] += residual
+        accounts_data = self._get_accounts_data(ag_pb_data.keys())
+        return ag_pb_data, accounts_data, partners_data, {}
+
+    def _get_matched_move_line_ids(self, move_line_ids):
+        """Return the ids of each move line and of the move lines reconciled
+        with it, keyed by move line id, read in one query."""
+        matched_line_ids = {ml_id: [ml_id] for ml_id in move_line_ids}
+        self.env["account.partial.reconcile"].flush_model(
+            ["debit_move_id", "credit_move_id"]
+        )
+        self.env.cr.execute(
+            """
+            SELECT debit_move_id, credit_move_id
+            FROM account_partial_reconcile
+            WHERE debit_move_id = ANY(%s) OR credit_move_id = ANY(%s)
+            """,
+            (move_line_ids, move_line_ids),
+        )
+        for debit_move_id, credit_move_id in self.env.cr.fetchall():
+            if debit_move_id in matched_line_ids:
+                matched_line_ids[debit_move_id].append(credit_move_id)
+            if credit_move_id in matched_line_ids:
+                matched_line_ids[credit_move_id].append(debit_move_id)
+        return matched_line_ids
 
     def _get_move_lines_data(
         self,
@@ -100,57 +217,33 @@ class AgedPartnerBalanceReport(models.AbstractModel):
         only_posted_moves,
         show_move_line_details,
     ):
-        domain = self._get_move_lines_domain_not_reconciled(
-            company_id, account_ids, partner_ids, only_posted_moves, date_from
+        if not show_move_line_details:
+            return self._get_aging_totals_data(
+                company_id,
+                account_ids,
+                partner_ids,
+                date_at_object,
+                date_from,
+                only_posted_moves,
+            )
+        move_lines = self._get_open_move_lines(
+            company_id,
+            account_ids,
+            partner_ids,
+            date_at_object,
+            date_from,
+            only_posted_moves,
         )
-        ml_fields = self._get_ml_fields()
-        line_model = self.env["account.move.line"]
-        move_lines = line_model.search_read(domain=domain, fields=ml_fields)
         journals_ids = set()
         partners_ids = set()
         partners_data = {}
         ag_pb_data = {}
-        if date_at_object < date.today():
-            (
-                acc_partial_rec,
-                debit_amount,
-                credit_amount,
-            ) = self._get_account_partial_reconciled(company_id, date_at_object)
-            if acc_partial_rec:
-                ml_ids = list(map(operator.itemgetter("id"), move_lines))
-                debit_ids = list(
-                    map(operator.itemgetter("debit_move_id"), acc_partial_rec)
-                )
-                credit_ids = list(
-                    map(operator.itemgetter("credit_move_id"), acc_partial_rec)
-                )
-                move_lines = self._recalculate_move_lines(
-                    move_lines,
-                    debit_ids,
-                    credit_ids,
-                    debit_amount,
-                    credit_amount,
-                    ml_ids,
-                    account_ids,
-                    company_id,
-                    partner_ids,
-                    only_posted_moves,
-                )
-        move_lines = [
-            move_line
-            for move_line in move_lines
-            if move_line["date"] <= date_at_object
-            and not float_is_zero(move_line["amount_residual"], precision_digits=2)
-        ]
-        for move_line in move_lines:
-            journals_ids.add(move_line["journal_id"][0])
-            acc_id = move_line["account_id"][0]
-            if move_line["partner_id"]:
-                prt_id = move_line["partner_id"][0]
-                prt_name = move_line["partner_id"][1]
-            else:
-                prt_id = 0
-                prt_name = ""
+        move_lines_data = []
+        for pos in range(len(move_lines)):
+            journals_ids.add(move_lines.columns["journal_id"][pos])
+            acc_id = move_lines.columns["account_id"][pos]
+            prt_id = move_lines.columns["partner_id"][pos]
+            prt_name = move_lines.names["partner_id"].get(prt_id, "")
             if prt_id not in partners_ids:
                 partners_data.update({prt_id: {"id": prt_id, "name": prt_name}})
                 partners_ids.add(prt_id)
@@ -160,6 +253,7 @@ class AgedPartnerBalanceReport(models.AbstractModel):
                 ag_pb_data = self._initialize_partner(ag_pb_data, acc_id, prt_id)
             move_line_data = {}
             if show_move_line_details:
+                move_line = move_lines.row(pos)
                 if move_line["ref"] == move_line["name"]:
                     if move_line["ref"]:
                         ref_label = move_line["ref"]
@@ -173,11 +267,13 @@ class AgedPartnerBalanceReport(models.AbstractModel):
                     ref_label = move_line["ref"] + str(" - ") + move_line["name"]
                 move_line_data.update(
                     {
-                        "line_rec": line_model.browse(move_line["id"]),
+                        "id": move_line["id"],
                         "date": move_line["date"],
+                        "entry_id": move_line["move_id"][0],
                         "entry": move_line["move_id"][1],
                         "jnl_id": move_line["journal_id"][0],
                         "acc_id": acc_id,
+                        "partner_id": prt_id or False,
                         "partner": prt_name,
                         "ref_label": ref_label,
                         "due_date": move_line["date_maturity"],
@@ -185,45 +281,28 @@ class AgedPartnerBalanceReport(models.AbstractModel):
                     }
                 )
                 ag_pb_data[acc_id][prt_id]["move_lines"].append(move_line_data)
-            ag_pb_data = self._calculate_amounts(
-                ag_pb_data,
-                acc_id,
-                prt_id,
-                move_line["amount_residual"],
-                move_line["date_maturity"],
-                date_at_object,
+                move_lines_data.append(move_line_data)
+        ag_pb_data = self._calculate_amounts(ag_pb_data, move_lines, date_at_object)
+        if move_lines_data:
+            matched_line_ids = self._get_matched_move_line_ids(
+                [move_line_data["id"] for move_line_data in move_lines_data]
             )
+            for move_line_data in move_lines_data:
+                move_line_data["matched_line_ids"] = matched_line_ids[
+                    move_line_data["id"]
+                ]
         journals_data = self._get_journals_data(list(journals_ids))
         accounts_data = self._get_accounts_data(ag_pb_data.keys())
         return ag_pb_data, accounts_data, partners_data, journals_data
 
     @api.model
     def _compute_maturity_date(self, ml, date_at_object):
-        ml.update(
-            {
-                "current": 0.0,
-                "30_days": 0.0,
-                "60_days": 0.0,
-                "90_days": 0.0,
-                "120_days": 0.0,
-                "older": 0.0,
-            }
-        )
-        due_date = ml["due_date"]
-        amount = ml["residual"]
-        today = date_at_object
-        if not due_date or today <= due_date:
-            ml["current"] += amount
-        elif today <= due_date + timedelta(days=30):
-            ml["30_days"] += amount
-        elif today <= due_date + timedelta(days=60):
-            ml["60_days"] += amount
-        elif today <= due_date + timedelta(days=90):
-            ml["90_days"] += amount
-        elif today <= due_date + timedelta(days=120):
-            ml["120_days"] += amount
-        else:
-            ml["older"] += amount
+        names = self._get_aging_buckets()[0]
+        ml.update(dict.fromkeys(names, 0.0))
+        bucket_index = self._get_aging_bucket_indexes([ml["due_date"]], date_at_object)[
+            0
+        ]
+        ml[names[bucket_index]] += ml["residual"]
 
     def _create_account_list(
         self,
@@ -235,32 +314,21 @@ class AgedPartnerBalanceReport(models.AbstractModel):
         date_at_oject,
     ):
         aged_partner_data = []
+        names = self._get_aging_buckets()[0]
         for account in accounts_data.values():
             acc_id = account["id"]
-            account.update(
-                {
-                    "residual": ag_pb_data[acc_id]["residual"],
-                    "current": ag_pb_data[acc_id]["current"],
-                    "30_days": ag_pb_data[acc_id]["30_days"],
-                    "60_days": ag_pb_data[acc_id]["60_days"],
-                    "90_days": ag_pb_data[acc_id]["90_days"],
-                    "120_days": ag_pb_data[acc_id]["120_days"],
-                    "older": ag_pb_data[acc_id]["older"],
-                    "partners": [],
-                }
-            )
+            account["residual"] = ag_pb_data[acc_id]["residual"]
+            for name in names:
+                account[name] = ag_pb_data[acc_id][name]
+            account["partners"] = []
             for prt_id in ag_pb_data[acc_id]:
                 if isinstance(prt_id, int):
                     partner = {
                         "name": partners_data[prt_id]["name"],
                         "residual": ag_pb_data[acc_id][prt_id]["residual"],
-                        "current": ag_pb_data[acc_id][prt_id]["current"],
-                        "30_days": ag_pb_data[acc_id][prt_id]["30_days"],
-                        "60_days": ag_pb_data[acc_id][prt_id]["60_days"],
-                        "90_days": ag_pb_data[acc_id][prt_id]["90_days"],
-                        "120_days": ag_pb_data[acc_id][prt_id]["120_days"],
-                        "older": ag_pb_data[acc_id][prt_id]["older"],
                     }
+                    for name in names:
+                        partner[name] = ag_pb_data[acc_id][prt_id][name]
                     if show_move_line_details:
                         move_lines = []
                         for ml in ag_pb_data[acc_id][prt_id]["move_lines"]:
@@ -280,42 +348,15 @@ class AgedPartnerBalanceReport(models.AbstractModel):
 
     @api.model
     def _calculate_percent(self, aged_partner_data):
+        names = self._get_aging_buckets()[0]
         for account in aged_partner_data:
-            if abs(account["residual"]) > 0.01:
-                total = account["residual"]
-                account.update(
-                    {
-                        "percent_current": abs(
-                            round((account["current"] / total) * 100, 2)
-                        ),
-                        "percent_30_days": abs(
-                            round((account["30_days"] / total) * 100, 2)
-                        ),
-                        "percent_60_days": abs(
-                            round((account["60_days"] / total) * 100, 2)
-                        ),
-                        "percent_90_days": abs(
-                            round((account["90_days"] / total) * 100, 2)
-                        ),
-                        "percent_120_days": abs(
-                            round((account["120_days"] / total) * 100, 2)
-                        ),
-                        "percent_older": abs(
-                            round((account["older"] / total) * 100, 2)
-                        ),
-                    }
-                )
-            else:
-                account.update(
-                    {
-                        "percent_current": 0.0,
-                        "percent_30_days": 0.0,
-                        "percent_60_days": 0.0,
-                        "percent_90_days": 0.0,
-                        "percent_120_days": 0.0,
-                        "percent_older": 0.0,
-                    }
-                )
+            total = account["residual"]
+            for name in names:
+                if abs(total) > 0.01:
+                    percent = abs(round((account[name] / total) * 100, 2))
+                else:
+                    percent = 0.0
+                account["percent_%s" % name] = percent
         return aged_partner_data
 
     def _get_report_values(self, docids, data):
@@ -329,21 +370,25 @@ class AgedPartnerBalanceReport(models.AbstractModel):
         date_from = data["date_from"]
         only_posted_moves = data["only_posted_moves"]
         show_move_line_details = data["show_move_line_details"]
-        (
-            ag_pb_data,
-            accounts_data,
-            partners_data,
-            journals_data,
-        ) = self._get_move_lines_data(
-            company_id,
-            account_ids,
-            partner_ids,
-            date_at_object,
-            date_from,
-            only_posted_moves,
-            show_move_line_details,
+        report = self.with_context(
+            age_partner_config_id=data.get("age_partner_config_id", False)
         )
-        aged_partner_data = self._create_account_list(
+        with report._open_items_cache():
+            (
+                ag_pb_data,
+                accounts_data,
+                partners_data,
+                journals_data,
+            ) = report._get_move_lines_data(
+                company_id,
+                account_ids,
+                partner_ids,
+                date_at_object,
+                date_from,
+                only_posted_moves,
+                show_move_line_details,
+            )
+        aged_partner_data = report._create_account_list(
             ag_pb_data,
             accounts_data,
             partners_data,
@@ -351,7 +396,7 @@ class AgedPartnerBalanceReport(models.AbstractModel):
             show_move_line_details,
             date_at_object,
         )
-        aged_partner_data = self._calculate_percent(aged_partner_data)
+        aged_partner_data = report._calculate_percent(aged_partner_data)
         return {
             "doc_ids": [wizard_id],
             "doc_model": "open.items.report.wizard",
@@ -362,11 +407,5 @@ class AgedPartnerBalanceReport(models.AbstractModel):
             "only_posted_moves": only_posted_moves,
             "aged_partner_balance": aged_partner_data,
             "show_move_lines_details": show_move_line_details,
+            "aging_columns": report._get_aging_columns(),
         }
-
-    def _get_ml_fields(self):
-        return self.COMMON_ML_FIELDS + [
-            "amount_residual",
-            "reconciled",
-            "date_maturity",
-        ]
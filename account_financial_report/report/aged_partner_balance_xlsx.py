@@ -20,9 +20,17 @@ class AgedPartnerBalanceXslx(models.AbstractModel):
             report_name = report_name + suffix
         return report_name
 
+    def _get_aging_columns(self, report):
+        return (
+            self.env["report.account_financial_report.aged_partner_balance"]
+            .with_context(age_partner_config_id=report.age_partner_config_id.id)
+            ._get_aging_columns()
+        )
+
     def _get_report_columns(self, report):
+        aging_columns = self._get_aging_columns(report)
         if not report.show_move_line_details:
-            return {
+            columns = {
                 0: {"header": _("Partner"), "field": "name", "width": 70},
                 1: {
                     "header": _("Residual"),
@@ -31,56 +39,18 @@ class AgedPartnerBalanceXslx(models.AbstractModel):
                     "type": "amount",
                     "width": 14,
                 },
-                2: {
-                    "header": _("Current"),
-                    "field": "current",
-                    "field_footer_total": "current",
-                    "field_footer_percent": "percent_current",
-                    "type": "amount",
-                    "width": 14,
-                },
-                3: {
-                    "header": _("Age ≤ 30 d."),
-                    "field": "30_days",
-                    "field_footer_total": "30_days",
-                    "field_footer_percent": "percent_30_days",
-                    "type": "amount",
-                    "width": 14,
-                },
-                4: {
-                    "header": _("Age ≤ 60 d."),
-                    "field": "60_days",
-                    "field_footer_total": "60_days",
-                    "field_footer_percent": "percent_60_days",
-                    "type": "amount",
-                    "width": 14,
-                },
-                5: {
-                    "header": _("Age ≤ 90 d."),
-                    "field": "90_days",
-                    "field_footer_total": "90_days",
-                    "field_footer_percent": "percent_90_days",
-                    "type": "amount",
-                    "width": 14,
-                },
-                6: {
-                    "header": _("Age ≤ 120 d."),
-                    "field": "120_days",
-                    "field_footer_total": "120_days",
-                    "field_footer_percent": "percent_120_days",
-                    "type": "amount",
-                    "width": 14,
-                },
-                7: {
-                    "header": _("Older"),
-                    "field": "older",
-                    "field_footer_total": "older",
-                    "field_footer_percent": "percent_older",
+            }
+            for aging_column in aging_columns:
+                columns[len(columns)] = {
+                    "header": aging_column["detail"],
+                    "field": aging_column["field"],
+                    "field_footer_total": aging_column["field"],
+                    "field_footer_percent": "percent_%s" % aging_column["field"],
                     "type": "amount",
                     "width": 14,
-                },
-            }
-        return {
+                }
+            return columns
+        columns = {
             0: {"header": _("Date"), "field": "date", "width": 11},
             1: {"header": _("Entry"), "field": "entry", "width": 18},
             2: {"header": _("Journal"), "field": "journal", "width": 8},
@@ -96,61 +66,18 @@ class AgedPartnerBalanceXslx(models.AbstractModel):
                 "type": "amount",
                 "width": 14,
             },
-            8: {
-                "header": _("Current"),
-                "field": "current",
-                "field_footer_total": "current",
-                "field_footer_percent": "percent_current",
-                "field_final_balance": "current",
-                "type": "amount",
-                "width": 14,
-            },
-            9: {
-                "header": _("Age ≤ 30 d."),
-                "field": "30_days",
-                "field_footer_total": "30_days",
-                "field_footer_percent": "percent_30_days",
-                "field_final_balance": "30_days",
-                "type": "amount",
-                "width": 14,
-            },
-            10: {
-                "header": _("Age ≤ 60 d."),
-                "field": "60_days",
-                "field_footer_total": "60_days",
-                "field_footer_percent": "percent_60_days",
-                "field_final_balance": "60_days",
-                "type": "amount",
-                "width": 14,
-            },
-            11: {
-                "header": _("Age ≤ 90 d."),
-                "field": "90_days",
-                "field_footer_total": "90_days",
-                "field_footer_percent": "percent_90_days",
-                "field_final_balance": "90_days",
-                "type": "amount",
-                "width": 14,
-            },
-            12: {
-                "header": _("Age ≤ 120 d."),
-                "field": "120_days",
-                "field_footer_total": "120_days",
-                "field_footer_percent": "percent_120_days",
-                "field_final_balance": "120_days",
-                "type": "amount",
-                "width": 14,
-            },
-            13: {
-                "header": _("Older"),
-                "field": "older",
-                "field_footer_total": "older",
-                "field_footer_percent": "percent_older",
-                "field_final_balance": "older",
+        }
+        for aging_column in aging_columns:
+            columns[len(columns)] = {
+                "header": aging_column["detail"],
+                "field": aging_column["field"],
+                "field_footer_total": aging_column["field"],
+                "field_footer_percent": "percent_%s" % aging_column["field"],
+                "field_final_balance": aging_column["field"],
                 "type": "amount",
                 "width": 14,
-            },
-        }
+            }
+        return columns
 
     def _get_report_filters(self, report):
         return [
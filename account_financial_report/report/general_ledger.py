@@ -7,7 +7,8 @@ import calendar
 import datetime
 import operator
 
-from odoo import _, api, models
+from odoo import _, api, fields, models
+from odoo.osv import expression
 from odoo.tools import float_is_zero
 
 
@@ -31,6 +32,7 @@ class GeneralLedgerReport(models.AbstractModel):
                 {
                     tax.id: {
                         "id": tax.id,
+                        "name": tax.name,
                         "amount": tax.amount,
                         "amount_type": tax.amount_type,
                         "display_name": tax.display_name,
@@ -50,6 +52,15 @@ class GeneralLedgerReport(models.AbstractModel):
             )
         return taxes_data
 
+    def _get_company_taxes_data(self, company_id, grouped_by):
+        """Taxes data of all the taxes of the company, read at once so that
+        move lines can be grouped by tax without reading them line by line."""
+        if grouped_by != "taxes":
+            return {}
+        domain = [("company_id", "=", company_id)] if company_id else []
+        taxes = self.env["account.tax"].with_context(active_test=False).search(domain)
+        return self._get_taxes_data(taxes.ids)
+
     def _get_account_internal_types(self, grouped_by):
         return (
             ["asset_receivable", "liability_payable"]
@@ -131,16 +142,32 @@ class GeneralLedgerReport(models.AbstractModel):
         return domain
 
     def _get_pl_initial_balance(
-        self, account_ids, company_id, fy_start_date, foreign_currency, base_domain
+        self,
+        account_ids,
+        company_id,
+        fy_start_date,
+        foreign_currency,
+        base_domain,
+        partner_ids=None,
+        cutoff=False,
     ):
         domain = self._get_initial_balance_fy_pl_ml_domain(
             account_ids, company_id, fy_start_date, base_domain
         )
+        if cutoff:
+            domain = expression.AND([domain, [("parent_state", "!=", "posted")]])
         initial_balances = self.env["account.move.line"].read_group(
             domain=domain,
             fields=["account_id", "debit", "credit", "balance", "amount_currency:sum"],
             groupby=["account_id"],
         )
+        if cutoff:
+            initial_balances += self._get_monthly_balances(
+                company_id,
+                self._get_initial_balance_account_ids(account_ids, company_id, False),
+                fields.Date.to_date(fy_start_date),
+                partner_ids=partner_ids,
+            )
         pl_initial_balance = {
             "debit": 0.0,
             "credit": 0.0,
@@ -154,8 +181,45 @@ class GeneralLedgerReport(models.AbstractModel):
             pl_initial_balance["bal_curr"] += initial_balance["amount_currency"]
         return pl_initial_balance
 
+    def _get_initial_balance_account_ids(
+        self, account_ids, company_id, include_initial_balance
+    ):
+        accounts_domain = [
+            ("company_id", "=", company_id),
+            ("include_initial_balance", "=", include_initial_balance),
+        ]
+        if account_ids:
+            accounts_domain += [("id", "in", account_ids)]
+        return self.env["account.account"].search(accounts_domain).ids
+
+    def _add_monthly_balances(self, gl_initial_acc, balances):
+        """Add the totals read from the monthly balances to the initial
+        balances read_group rows of the same accounts."""
+        gl_initial_acc = {gl["account_id"][0]: gl for gl in gl_initial_acc}
+        for balance in balances:
+            acc_id = balance["account_id"]
+            if acc_id not in gl_initial_acc:
+                gl_initial_acc[acc_id] = {
+                    "account_id": (acc_id, ""),
+                    "debit": 0.0,
+                    "credit": 0.0,
+                    "balance": 0.0,
+                    "amount_currency": 0.0,
+                }
+            for fname in ["debit", "credit", "balance", "amount_currency"]:
+                gl_initial_acc[acc_id][fname] += balance[fname]
+        return list(gl_initial_acc.values())
+
     def _get_gl_initial_acc(
-        self, account_ids, company_id, date_from, fy_start_date, base_domain, grouped_by
+        self,
+        account_ids,
+        company_id,
+        date_from,
+        fy_start_date,
+        base_domain,
+        grouped_by,
+        partner_ids=None,
+        cutoff=False,
     ):
         initial_domain_bs = self._get_initial_balances_bs_ml_domain(
             account_ids, company_id, date_from, base_domain, grouped_by
@@ -163,7 +227,30 @@ class GeneralLedgerReport(models.AbstractModel):
         initial_domain_pl = self._get_initial_balances_pl_ml_domain(
             account_ids, company_id, date_from, fy_start_date, base_domain
         )
-        return self._get_accounts_initial_balance(initial_domain_bs, initial_domain_pl)
+        if not cutoff:
+            return self._get_accounts_initial_balance(
+                initial_domain_bs, initial_domain_pl
+            )
+        # The posted items before the cutoff are read from the monthly
+        # balances, only the remaining ones are summed by read_group.
+        tail_domain = self._get_monthly_balance_tail_domain(cutoff)
+        gl_initial_acc = self._get_accounts_initial_balance(
+            expression.AND([initial_domain_bs, tail_domain]),
+            expression.AND([initial_domain_pl, tail_domain]),
+        )
+        bs_ids = self._get_initial_balance_account_ids(account_ids, company_id, True)
+        pl_ids = self._get_initial_balance_account_ids(account_ids, company_id, False)
+        balances = self._get_monthly_balances(
+            company_id, bs_ids, cutoff, partner_ids=partner_ids
+        )
+        balances += self._get_monthly_balances(
+            company_id,
+            pl_ids,
+            cutoff,
+            month_from=fields.Date.to_date(fy_start_date),
+            partner_ids=partner_ids,
+        )
+        return self._add_monthly_balances(gl_initial_acc, balances)
 
     def _prepare_gen_ld_data_item(self, gl):
         res = {}
@@ -278,8 +365,20 @@ class GeneralLedgerReport(models.AbstractModel):
             base_domain += [("analytic_account_ids", "in", cost_center_ids)]
         if extra_domain:
             base_domain += extra_domain
+        # The monthly balances cannot be filtered by analytic account nor by
+        # an arbitrary domain
+        cutoff = not (
+            cost_center_ids or extra_domain
+        ) and self._get_monthly_balance_cutoff(date_from, fy_start_date)
         gl_initial_acc = self._get_gl_initial_acc(
-            account_ids, company_id, date_from, fy_start_date, base_domain, grouped_by
+            account_ids,
+            company_id,
+            date_from,
+            fy_start_date,
+            base_domain,
+            grouped_by,
+            partner_ids=partner_ids,
+            cutoff=cutoff,
         )
         domain = self._get_initial_balances_bs_ml_domain(
             account_ids, company_id, date_from, base_domain, grouped_by, acc_prt=True
@@ -295,7 +394,13 @@ class GeneralLedgerReport(models.AbstractModel):
                 data[unaffected_id]["mame"] = ""
                 data[unaffected_id][grouped_by] = False
             pl_initial_balance = self._get_pl_initial_balance(
-                account_ids, company_id, fy_start_date, foreign_currency, base_domain
+                account_ids,
+                company_id,
+                fy_start_date,
+                foreign_currency,
+                base_domain,
+                partner_ids=partner_ids,
+                cutoff=cutoff,
             )
             for key_bal in ["init_bal", "fin_bal"]:
                 fields_balance = ["credit", "debit", "balance"]
@@ -339,6 +444,8 @@ class GeneralLedgerReport(models.AbstractModel):
             "currency_id": move_line["currency_id"],
             "analytic_distribution": move_line["analytic_distribution"] or {},
         }
+        if "cumul_balance" in move_line:
+            move_line_data["cumul_balance"] = move_line["cumul_balance"]
         if (
             move_line_data["ref"] == move_line_data["name"]
             or move_line_data["ref"] == ""
@@ -382,6 +489,33 @@ class GeneralLedgerReport(models.AbstractModel):
             domain += [("analytic_account_ids", "in", cost_center_ids)]
         return domain
 
+    def _use_sql_cumul_balance(self, grouped_by):
+        # A move line is listed under each of its taxes when grouping by
+        # taxes, which a single window over the move lines can't express.
+        return grouped_by != "taxes"
+
+    def _get_period_ml_extra_select(self, grouped_by, acc_prt_account_ids):
+        """Running balance of each period move line computed by the database,
+        partitioned the same way the lines are listed in the report: by
+        account, and by partner on the partner accounts when grouping by
+        partners. The lines of a same date are cumulated in the default
+        order of the move lines."""
+        if not self._use_sql_cumul_balance(grouped_by):
+            return {}
+        partition = '"account_move_line".account_id'
+        if grouped_by == "partners" and acc_prt_account_ids:
+            partition += self.env.cr.mogrify(
+                ', CASE WHEN "account_move_line".account_id IN %s '
+                'THEN "account_move_line".partner_id END',
+                (tuple(acc_prt_account_ids),),
+            ).decode()
+        return {
+            "cumul_balance": 'SUM("account_move_line".balance) OVER ('
+            "PARTITION BY %s "
+            'ORDER BY "account_move_line".date, "account_move_line".move_name DESC, '
+            '"account_move_line".id)' % partition
+        }
+
     def _initialize_data(self, foreign_currency):
         res = {}
         for key_bal in ["init_bal", "fin_bal"]:
@@ -408,7 +542,7 @@ class GeneralLedgerReport(models.AbstractModel):
         rec_after_date_to_ids = [i[0] for i in rec_after_date_to_ids]
         return rec_after_date_to_ids
 
-    def _prepare_ml_items(self, move_line, grouped_by):
+    def _prepare_ml_items(self, move_line, grouped_by, taxes_data=None):
         res = []
         if grouped_by == "partners":
             item_id = move_line["partner_id"][0] if move_line["partner_id"] else 0
@@ -424,9 +558,13 @@ class GeneralLedgerReport(models.AbstractModel):
                 item_name = move_line["tax_line_id"][1]
                 res.append({"id": item_id, "name": item_name})
             elif move_line["tax_ids"]:
+                if taxes_data is None:
+                    taxes_data = {}
+                missing_tax_ids = set(move_line["tax_ids"]) - taxes_data.keys()
+                if missing_tax_ids:
+                    taxes_data.update(self._get_taxes_data(list(missing_tax_ids)))
                 for tax_id in move_line["tax_ids"]:
-                    tax_item = self.env["account.tax"].browse(tax_id)
-                    res.append({"id": tax_item.id, "name": tax_item.name})
+                    res.append({"id": tax_id, "name": taxes_data[tax_id]["name"]})
             else:
                 res.append({"id": 0, "name": "Missing Tax"})
         else:
@@ -446,6 +584,7 @@ class GeneralLedgerReport(models.AbstractModel):
         cost_center_ids,
         extra_domain,
         grouped_by,
+        centralized_account_ids=None,
     ):
         domain = self._get_period_domain(
             account_ids,
@@ -458,17 +597,33 @@ class GeneralLedgerReport(models.AbstractModel):
         )
         if extra_domain:
             domain += extra_domain
+        journal_ids = set()
+        if centralized_account_ids:
+            journal_ids = self._add_centralized_data(
+                gen_ld_data,
+                domain + [("account_id", "in", centralized_account_ids)],
+                centralized_account_ids,
+                date_to,
+                foreign_currency,
+                grouped_by,
+            )
+            domain += [("account_id", "not in", centralized_account_ids)]
         ml_fields = self._get_ml_fields()
-        move_lines = self.env["account.move.line"].search_read(
-            domain=domain, fields=ml_fields
+        acc_prt_account_ids = set(
+            self._get_acc_prt_accounts_ids(company_id, grouped_by)
         )
-        journal_ids = set()
+        extra_select = self._get_period_ml_extra_select(grouped_by, acc_prt_account_ids)
         full_reconcile_ids = set()
         taxes_ids = set()
+        company_taxes_data = self._get_company_taxes_data(company_id, grouped_by)
         analytic_ids = set()
         full_reconcile_data = {}
-        acc_prt_account_ids = self._get_acc_prt_accounts_ids(company_id, grouped_by)
-        for move_line in move_lines:
+        for move_line in self._iter_move_lines(
+            domain,
+            ml_fields,
+            order="date, move_name desc, id",
+            extra_select=extra_select,
+        ):
             journal_ids.add(move_line["journal_id"][0])
             for tax_id in move_line["tax_ids"]:
                 taxes_ids.add(tax_id)
@@ -495,7 +650,9 @@ class GeneralLedgerReport(models.AbstractModel):
                 if grouped_by:
                     gen_ld_data[acc_id][grouped_by] = False
             if acc_id in acc_prt_account_ids:
-                item_ids = self._prepare_ml_items(move_line, grouped_by)
+                item_ids = self._prepare_ml_items(
+                    move_line, grouped_by, taxes_data=company_taxes_data
+                )
                 for item in item_ids:
                     item_id = item["id"]
                     if item_id not in gen_ld_data[acc_id]:
@@ -533,7 +690,12 @@ class GeneralLedgerReport(models.AbstractModel):
                 ]
         journals_data = self._get_journals_data(list(journal_ids))
         accounts_data = self._get_accounts_data(gen_ld_data.keys())
-        taxes_data = self._get_taxes_data(list(taxes_ids))
+        taxes_data = {
+            tax_id: company_taxes_data[tax_id]
+            for tax_id in taxes_ids
+            if tax_id in company_taxes_data
+        }
+        taxes_data.update(self._get_taxes_data(list(taxes_ids - taxes_data.keys())))
         analytic_data = self._get_analytic_data(list(analytic_ids))
         rec_after_date_to_ids = self._get_reconciled_after_date_to_ids(
             full_reconcile_data.keys(), date_to
@@ -559,6 +721,29 @@ class GeneralLedgerReport(models.AbstractModel):
                 move_line["rec_name"] = "(" + _("future") + ") " + move_line["rec_name"]
         return move_lines
 
+    @api.model
+    def _apply_sql_cumul_balance(
+        self, move_lines, initial_balance, rec_after_date_to_ids
+    ):
+        for move_line in move_lines:
+            move_line["balance"] = initial_balance + move_line.pop("cumul_balance")
+            if move_line["rec_id"] in rec_after_date_to_ids:
+                move_line["rec_name"] = "(" + _("future") + ") " + move_line["rec_name"]
+        return move_lines
+
+    def _get_cumul_move_lines(
+        self, move_lines, initial_balance, rec_after_date_to_ids, grouped_by
+    ):
+        if self._use_sql_cumul_balance(grouped_by):
+            # Lines are already fetched by date with their running balance
+            return self._apply_sql_cumul_balance(
+                move_lines, initial_balance, rec_after_date_to_ids
+            )
+        move_lines = sorted(move_lines, key=lambda k: (k["date"]))
+        return self._recalculate_cumul_balance(
+            move_lines, initial_balance, rec_after_date_to_ids
+        )
+
     def _create_account(self, account, acc_id, gen_led_data, rec_after_date_to_ids):
         move_lines = []
         for ml_id in gen_led_data[acc_id].keys():
@@ -566,15 +751,31 @@ class GeneralLedgerReport(models.AbstractModel):
                 account.update({ml_id: gen_led_data[acc_id][ml_id]})
             else:
                 move_lines += [gen_led_data[acc_id][ml_id]]
-        move_lines = sorted(move_lines, key=lambda k: (k["date"]))
-        move_lines = self._recalculate_cumul_balance(
+        move_lines = self._get_cumul_move_lines(
             move_lines,
             gen_led_data[acc_id]["init_bal"]["balance"],
             rec_after_date_to_ids,
+            account["grouped_by"],
         )
         account.update({"move_lines": move_lines})
         return account
 
+    def _create_centralized_account(
+        self, account, acc_id, gen_led_data, rec_after_date_to_ids, grouped_by
+    ):
+        for key in gen_led_data[acc_id].keys():
+            if not isinstance(key, int) and key != "centralized_ml":
+                account.update({key: gen_led_data[acc_id][key]})
+        move_lines = self._recalculate_cumul_balance(
+            gen_led_data[acc_id]["centralized_ml"],
+            gen_led_data[acc_id]["init_bal"]["balance"],
+            rec_after_date_to_ids,
+        )
+        account.update({"move_lines": move_lines})
+        if grouped_by:
+            account[grouped_by] = False
+        return account
+
     def _create_account_not_show_item(
         self, account, acc_id, gen_led_data, rec_after_date_to_ids, grouped_by
     ):
@@ -586,11 +787,11 @@ class GeneralLedgerReport(models.AbstractModel):
                 for ml_id in gen_led_data[acc_id][prt_id].keys():
                     if isinstance(ml_id, int):
                         move_lines += [gen_led_data[acc_id][prt_id][ml_id]]
-        move_lines = sorted(move_lines, key=lambda k: (k["date"]))
-        move_lines = self._recalculate_cumul_balance(
+        move_lines = self._get_cumul_move_lines(
             move_lines,
             gen_led_data[acc_id]["init_bal"]["balance"],
             rec_after_date_to_ids,
+            grouped_by,
         )
         account.update({"move_lines": move_lines, grouped_by: False})
         return account
@@ -610,11 +811,11 @@ class GeneralLedgerReport(models.AbstractModel):
                         group_item.update({ml_id: data[data_id][ml_id]})
                     else:
                         move_lines += [data[data_id][ml_id]]
-                move_lines = sorted(move_lines, key=lambda k: (k["date"]))
-                move_lines = self._recalculate_cumul_balance(
+                move_lines = self._get_cumul_move_lines(
                     move_lines,
                     data[data_id]["init_bal"]["balance"],
                     rec_after_date_to_ids,
+                    account["grouped_by"],
                 )
                 group_item.update({"move_lines": move_lines})
                 if (
@@ -651,7 +852,20 @@ class GeneralLedgerReport(models.AbstractModel):
                     "grouped_by": grouped_by,
                 }
             )
-            if grouped_by and not gen_led_data[acc_id][grouped_by]:
+            if "centralized_ml" in gen_led_data[acc_id]:
+                account = self._create_centralized_account(
+                    account, acc_id, gen_led_data, rec_after_date_to_ids, grouped_by
+                )
+                if (
+                    hide_account_at_0
+                    and float_is_zero(
+                        gen_led_data[acc_id]["init_bal"]["balance"],
+                        precision_rounding=rounding,
+                    )
+                    and account["move_lines"] == []
+                ):
+                    continue
+            elif grouped_by and not gen_led_data[acc_id][grouped_by]:
                 account = self._create_account(
                     account, acc_id, gen_led_data, rec_after_date_to_ids
                 )
@@ -699,70 +913,117 @@ class GeneralLedgerReport(models.AbstractModel):
             general_ledger += [account]
         return general_ledger
 
+    def _get_centralized_account_ids(self, company_id, account_ids):
+        domain = [("centralized", "=", True)]
+        if company_id:
+            domain += [("company_id", "=", company_id)]
+        if account_ids:
+            domain += [("id", "in", account_ids)]
+        return self.env["account.account"].search(domain).ids
+
     @api.model
-    def _calculate_centralization(self, centralized_ml, move_line, date_to):
-        jnl_id = move_line["journal_id"]
-        month = move_line["date"].month
-        if jnl_id not in centralized_ml.keys():
-            centralized_ml[jnl_id] = {}
-        if month not in centralized_ml[jnl_id].keys():
-            centralized_ml[jnl_id][month] = {}
-            last_day_month = calendar.monthrange(move_line["date"].year, month)
-            date = datetime.date(move_line["date"].year, month, last_day_month[1])
-            if date > date_to:
-                date = date_to
-            centralized_ml[jnl_id][month].update(
-                {
-                    "journal_id": jnl_id,
-                    "ref_label": "Centralized entries",
-                    "date": date,
-                    "debit": 0.0,
-                    "credit": 0.0,
-                    "balance": 0.0,
-                    "bal_curr": 0.0,
-                    "partner_id": False,
-                    "rec_id": 0,
-                    "entry_id": False,
-                    "tax_ids": [],
-                    "tax_line_id": False,
-                    "full_reconcile_id": False,
-                    "id": False,
-                    "currency_id": False,
-                    "analytic_distribution": {},
-                }
-            )
-        centralized_ml[jnl_id][month]["debit"] += move_line["debit"]
-        centralized_ml[jnl_id][month]["credit"] += move_line["credit"]
-        centralized_ml[jnl_id][month]["balance"] += (
-            move_line["debit"] - move_line["credit"]
-        )
-        centralized_ml[jnl_id][month]["bal_curr"] += move_line["bal_curr"]
-        return centralized_ml
+    def _prepare_centralized_ml(self, journal_id, month, date_to):
+        last_day_month = calendar.monthrange(month.year, month.month)
+        date = datetime.date(month.year, month.month, last_day_month[1])
+        if date > date_to:
+            date = date_to
+        return {
+            "journal_id": journal_id,
+            "ref_label": "Centralized entries",
+            "date": date,
+            "debit": 0.0,
+            "credit": 0.0,
+            "balance": 0.0,
+            "bal_curr": 0.0,
+            "partner_id": False,
+            "rec_id": 0,
+            "entry_id": False,
+            "tax_ids": [],
+            "tax_line_id": False,
+            "full_reconcile_id": False,
+            "id": False,
+            "currency_id": False,
+            "analytic_distribution": {},
+        }
+
+    def _add_centralized_data(
+        self,
+        gen_ld_data,
+        domain,
+        centralized_account_ids,
+        date_to,
+        foreign_currency,
+        grouped_by,
+    ):
+        """Add the centralized lines of the centralized accounts to the
+        ledger data and return the ids of their journals."""
+        journal_ids = set()
+        centralized_ml = self._get_centralized_ml(domain, date_to)
+        for acc_id in centralized_account_ids:
+            if acc_id not in centralized_ml and acc_id not in gen_ld_data:
+                continue
+            if acc_id not in gen_ld_data:
+                gen_ld_data[acc_id] = self._initialize_data(foreign_currency)
+                gen_ld_data[acc_id]["id"] = acc_id
+                gen_ld_data[acc_id]["name"] = ""
+                if grouped_by:
+                    gen_ld_data[acc_id][grouped_by] = False
+            gen_ld_data[acc_id]["centralized_ml"] = centralized_ml.get(acc_id, [])
+            for move_line in gen_ld_data[acc_id]["centralized_ml"]:
+                journal_ids.add(move_line["journal_id"])
+                for field_name in ["credit", "debit", "balance"]:
+                    gen_ld_data[acc_id]["fin_bal"][field_name] += move_line[field_name]
+                if foreign_currency:
+                    gen_ld_data[acc_id]["fin_bal"]["bal_curr"] += move_line["bal_curr"]
+        return journal_ids
 
     @api.model
-    def _get_centralized_ml(self, account, date_to, grouped_by):
-        centralized_ml = {}
+    def _get_centralized_ml(self, domain, date_to):
+        """Return the centralized lines (one per journal and month) of the
+        move lines matching the domain, grouped by account. The sums are
+        computed by the database so the move lines themselves are never
+        loaded."""
         if isinstance(date_to, str):
             date_to = datetime.datetime.strptime(date_to, "%Y-%m-%d").date()
-        if grouped_by and account[grouped_by]:
-            for item in account["list_grouped"]:
-                for move_line in item["move_lines"]:
-                    centralized_ml = self._calculate_centralization(
-                        centralized_ml,
-                        move_line,
-                        date_to,
-                    )
-        else:
-            for move_line in account["move_lines"]:
-                centralized_ml = self._calculate_centralization(
-                    centralized_ml,
-                    move_line,
-                    date_to,
-                )
-        list_centralized_ml = []
-        for jnl_id in centralized_ml.keys():
-            list_centralized_ml += list(centralized_ml[jnl_id].values())
-        return list_centralized_ml
+        query = self.env["account.move.line"]._search(domain)
+        from_clause, where_clause, where_params = query.get_sql()
+        query_str = """
+            SELECT "account_move_line".account_id,
+                "account_move_line".journal_id,
+                date_trunc('month', "account_move_line".date)::date AS month,
+                SUM("account_move_line".debit),
+                SUM("account_move_line".credit),
+                SUM("account_move_line".balance),
+                SUM("account_move_line".amount_currency)
+            FROM {}
+            WHERE {}
+            GROUP BY 1, 2, 3
+            ORDER BY 1, 2, 3
+        """.format(
+            from_clause, where_clause
+        )
+        self.env.cr.execute(query_str, where_params)
+        centralized_ml = {}
+        for (
+            acc_id,
+            journal_id,
+            month,
+            debit,
+            credit,
+            balance,
+            amount_currency,
+        ) in self.env.cr.fetchall():
+            move_line = self._prepare_centralized_ml(journal_id, month, date_to)
+            move_line.update(
+                {
+                    "debit": debit,
+                    "credit": credit,
+                    "balance": balance,
+                    "bal_curr": amount_currency,
+                }
+            )
+            centralized_ml.setdefault(acc_id, []).append(move_line)
+        return centralized_ml
 
     def _get_report_values(self, docids, data):
         wizard_id = data["wizard_id"]
@@ -794,6 +1055,11 @@ class GeneralLedgerReport(models.AbstractModel):
             grouped_by,
         )
         centralize = data["centralize"]
+        centralized_account_ids = []
+        if centralize:
+            centralized_account_ids = self._get_centralized_account_ids(
+                company_id, account_ids
+            )
         (
             gen_ld_data,
             accounts_data,
@@ -814,6 +1080,7 @@ class GeneralLedgerReport(models.AbstractModel):
             cost_center_ids,
             extra_domain,
             grouped_by,
+            centralized_account_ids=centralized_account_ids,
         )
         general_ledger = self._create_general_ledger(
             gen_ld_data,
@@ -822,21 +1089,6 @@ class GeneralLedgerReport(models.AbstractModel):
             rec_after_date_to_ids,
             hide_account_at_0,
         )
-        if centralize:
-            for account in general_ledger:
-                if account["centralized"]:
-                    centralized_ml = self._get_centralized_ml(
-                        account, date_to, grouped_by
-                    )
-                    account["move_lines"] = centralized_ml
-                    account["move_lines"] = self._recalculate_cumul_balance(
-                        account["move_lines"],
-                        gen_ld_data[account["id"]]["init_bal"]["balance"],
-                        rec_after_date_to_ids,
-                    )
-                    if grouped_by and account[grouped_by]:
-                        account[grouped_by] = False
-                        del account["list_grouped"]
         general_ledger = sorted(general_ledger, key=lambda k: k["code"])
         return {
             "doc_ids": [wizard_id],
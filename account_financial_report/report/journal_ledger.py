@@ -3,13 +3,19 @@
 
 import itertools
 import operator
+from concurrent.futures import ThreadPoolExecutor
 
-from odoo import models
+from odoo import api, models
+
+# Maximum number of threads, each holding a database connection, building
+# the sections of a journal ledger
+JOURNAL_LEDGER_MAX_WORKERS = 4
 
 
 class JournalLedgerReport(models.AbstractModel):
     _name = "report.account_financial_report.journal_ledger"
     _description = "Journal Ledger Report"
+    _inherit = "report.account_financial_report.abstract_report"
 
     def _get_journal_ledger_data(self, journal):
         return {
@@ -92,31 +98,73 @@ class JournalLedgerReport(models.AbstractModel):
         """
         return "move_id"
 
+    def _get_move_lines_columns(self):
+        return [
+            "id",
+            "move_id",
+            "date",
+            "journal_id",
+            "account_id",
+            "partner_id",
+            "name",
+            "debit",
+            "credit",
+            "balance",
+            "company_currency_id",
+            "amount_currency",
+            "currency_id",
+            "tax_line_id",
+        ]
+
     def _get_move_lines_data(self, ml, wizard, ml_taxes, auto_sequence, exigible):
+        """Return the report values of a move line record.
+
+        The report reads the move lines as rows and calls
+        _get_move_line_row_data instead, unless a module overrides this
+        method: the report then browses the move lines, by chunks, and calls
+        it as before.
+        """
+        row = {}
+        for column in self._get_move_lines_columns():
+            value = ml[column]
+            row[column] = value.id if isinstance(value, models.BaseModel) else value
+        return self._get_move_line_row_data(
+            row, wizard, ml_taxes, auto_sequence, exigible
+        )
+
+    def _get_move_line_row_data(self, ml, wizard, ml_taxes, auto_sequence, exigible):
+        """Return the report values of a move line, given as a dict of the
+        columns of _get_move_lines_columns.
+
+        This is the hook called by _get_move_lines, which reads the move
+        lines as rows: override it (and _get_move_lines_columns for any
+        other column) rather than _get_move_lines_data, which costs the
+        browsing of the move lines.
+        """
         base_debit = (
             base_credit
         ) = tax_debit = tax_credit = base_balance = tax_balance = 0.0
         if exigible:
-            base_debit = ml_taxes and ml.debit or 0.0
-            base_credit = ml_taxes and ml.credit or 0.0
-            base_balance = ml_taxes and ml.balance or 0.0
-            tax_debit = ml.tax_line_id and ml.debit or 0.0
-            tax_credit = ml.tax_line_id and ml.credit or 0.0
-            tax_balance = ml.tax_line_id and ml.balance or 0.0
+            base_debit = ml_taxes and ml["debit"] or 0.0
+            base_credit = ml_taxes and ml["credit"] or 0.0
+            base_balance = ml_taxes and ml["balance"] or 0.0
+            tax_debit = ml["tax_line_id"] and ml["debit"] or 0.0
+            tax_credit = ml["tax_line_id"] and ml["credit"] or 0.0
+            tax_balance = ml["tax_line_id"] and ml["balance"] or 0.0
         return {
-            "move_line_id": ml.id,
-            "move_id": ml.move_id.id,
-            "date": ml.date,
-            "journal_id": ml.journal_id.id,
-            "account_id": ml.account_id.id,
-            "partner_id": ml.partner_id.id,
-            "label": ml.name,
-            "debit": ml.debit,
-            "credit": ml.credit,
-            "company_currency_id": ml.company_currency_id.id,
-            "amount_currency": ml.amount_currency,
-            "currency_id": ml.currency_id.id,
-            "tax_line_id": ml.tax_line_id.id,
+            "move_line_id": ml["id"],
+            "move_id": ml["move_id"],
+            "date": ml["date"],
+            "journal_id": ml["journal_id"],
+            "account_id": ml["account_id"] or False,
+            "partner_id": ml["partner_id"] or False,
+            "label": ml["name"] or False,
+            "debit": ml["debit"],
+            "credit": ml["credit"],
+            "company_currency_id": ml["company_currency_id"] or False,
+            "amount_currency": ml["amount_currency"],
+            "currency_id": ml["currency_id"] or False,
+            "tax_line_id": ml["tax_line_id"] or False,
             "tax_ids": list(ml_taxes.keys()),
             "base_debit": base_debit,
             "base_credit": base_credit,
@@ -181,18 +229,37 @@ class JournalLedgerReport(models.AbstractModel):
         return {"move_line_ids": tuple(move_lines.ids)}
 
     def _get_move_lines(self, move_ids, wizard, journal_ids):
-        move_lines = self.env["account.move.line"].search(
-            self._get_move_lines_domain(move_ids, wizard, journal_ids),
-            order=self._get_move_lines_order(move_ids, wizard, journal_ids),
-        )
-        move_lines_exigible = self.env["account.move.line"].search(
-            self._get_move_lines_domain(move_ids, wizard, journal_ids)
-            + self.env["account.move.line"]._get_tax_exigible_domain(),
+        domain = self._get_move_lines_domain(move_ids, wizard, journal_ids)
+        # Only the ids are needed to check the exigibility of each line
+        exigible_ids = set(
+            self.env["account.move.line"]._search(
+                domain + self.env["account.move.line"]._get_tax_exigible_domain(),
+            )
         )
+        move_line_ids = []
         move_line_ids_taxes_data = {}
-        if move_lines:
+        Move_Lines = {}
+        account_ids = set()
+        partner_ids = set()
+        currency_ids = set()
+        tax_line_ids = set()
+        auto_sequence = len(move_ids)
+        # The record based hook is only called when a module overrides it
+        record_hook = (
+            type(self)._get_move_lines_data
+            is not JournalLedgerReport._get_move_lines_data
+        )
+        for rows in self._iter_move_line_rows(
+            domain,
+            self._get_move_lines_columns(),
+            order=self._get_move_lines_order(move_ids, wizard, journal_ids),
+        ):
+            chunk_ids = [ml["id"] for ml in rows]
+            move_line_ids += chunk_ids
             # Get the taxes ids for the move lines
-            query_taxes_params = self._get_query_taxes_params(move_lines)
+            query_taxes_params = self._get_query_taxes_params(
+                self.env["account.move.line"].browse(chunk_ids)
+            )
             query_taxes = self._get_query_taxes()
             self.env.cr.execute(query_taxes, query_taxes_params)
             # Fetch the taxes associated to the move line
@@ -208,39 +275,47 @@ class JournalLedgerReport(models.AbstractModel):
                     "name": tax_name,
                     "description": tax_description,
                 }
-        Move_Lines = {}
-        accounts = self.env["account.account"]
-        partners = self.env["res.partner"]
-        currencies = self.env["res.currency"]
-        tax_lines = self.env["account.tax"]
-        auto_sequence = len(move_ids)
-        for ml in move_lines:
-            if ml.account_id not in accounts:
-                accounts |= ml.account_id
-            if ml.partner_id not in partners:
-                partners |= ml.partner_id
-            if ml.currency_id not in currencies:
-                currencies |= ml.currency_id
-            if ml.tax_line_id not in tax_lines:
-                tax_lines |= ml.tax_line_id
-            if ml.move_id.id not in Move_Lines.keys():
-                Move_Lines[ml.move_id.id] = []
-                auto_sequence -= 1
-            taxes = (
-                ml.id in move_line_ids_taxes_data.keys()
-                and move_line_ids_taxes_data[ml.id]
-                or {}
-            )
-            exigible = ml in move_lines_exigible
-            Move_Lines[ml.move_id.id].append(
-                self._get_move_lines_data(ml, wizard, taxes, auto_sequence, exigible)
-            )
-        account_ids_data = self._get_account_data(accounts)
-        partner_ids_data = self._get_partner_data(partners)
-        currency_ids_data = self._get_currency_data(currencies)
-        tax_line_ids_data = self._get_tax_line_data(tax_lines)
+            for ml in rows:
+                account_ids.add(ml["account_id"])
+                partner_ids.add(ml["partner_id"])
+                currency_ids.add(ml["currency_id"])
+                tax_line_ids.add(ml["tax_line_id"])
+                if ml["move_id"] not in Move_Lines.keys():
+                    Move_Lines[ml["move_id"]] = []
+                    auto_sequence -= 1
+                taxes = move_line_ids_taxes_data.get(ml["id"], {})
+                exigible = ml["id"] in exigible_ids
+                if record_hook:
+                    ml_data = self._get_move_lines_data(
+                        self.env["account.move.line"]
+                        .browse(ml["id"])
+                        .with_prefetch(chunk_ids),
+                        wizard,
+                        taxes,
+                        auto_sequence,
+                        exigible,
+                    )
+                else:
+                    ml_data = self._get_move_line_row_data(
+                        ml, wizard, taxes, auto_sequence, exigible
+                    )
+                Move_Lines[ml["move_id"]].append(ml_data)
+            if record_hook:
+                self.env["account.move.line"].browse(chunk_ids).invalidate_recordset()
+        account_ids_data = self._get_account_data(
+            self.env["account.account"].browse(account_ids - {None})
+        )
+        partner_ids_data = self._get_partner_data(
+            self.env["res.partner"].browse(partner_ids - {None})
+        )
+        currency_ids_data = self._get_currency_data(
+            self.env["res.currency"].browse(currency_ids - {None})
+        )
+        tax_line_ids_data = self._get_tax_line_data(
+            self.env["account.tax"].browse(tax_line_ids - {None})
+        )
         return (
-            move_lines.ids,
+            move_line_ids,
             Move_Lines,
             account_ids_data,
             partner_ids_data,
@@ -249,74 +324,110 @@ class JournalLedgerReport(models.AbstractModel):
             move_line_ids_taxes_data,
         )
 
-    def _get_journal_tax_lines(self, wizard, moves_data):
+    def _get_query_journal_taxes(self, from_clause, where_clause, exigible_query):
+        """Sum the base and tax amounts of the move lines by journal and tax.
+
+        A line counts for its tax line tax and for each of its base taxes,
+        once per tax. Its amounts go to the base totals when it has base
+        taxes and to the tax totals when it is a tax line, but only if it is
+        exigible.
+        """
+        return """
+            WITH lines AS (
+                SELECT "account_move_line".id,
+                    "account_move_line".journal_id,
+                    "account_move_line".tax_line_id,
+                    "account_move_line".debit,
+                    "account_move_line".credit,
+                    "account_move_line".balance,
+                    "account_move_line".id IN ({exigible_query}) AS exigible,
+                    EXISTS (
+                        SELECT 1 FROM account_move_line_account_tax_rel
+                        WHERE account_move_line_id = "account_move_line".id
+                    ) AS has_taxes
+                FROM {from_clause}
+                WHERE {where_clause}
+            ),
+            line_taxes AS (
+                SELECT id AS line_id, tax_line_id AS tax_id
+                FROM lines
+                WHERE tax_line_id IS NOT NULL
+                UNION
+                SELECT aml_at_rel.account_move_line_id, aml_at_rel.account_tax_id
+                FROM account_move_line_account_tax_rel AS aml_at_rel
+                JOIN lines ON lines.id = aml_at_rel.account_move_line_id
+            )
+            SELECT lines.journal_id, line_taxes.tax_id,
+                SUM(CASE WHEN exigible AND has_taxes THEN debit ELSE 0 END),
+                SUM(CASE WHEN exigible AND has_taxes THEN credit ELSE 0 END),
+                SUM(CASE WHEN exigible AND has_taxes THEN balance ELSE 0 END),
+                SUM(CASE WHEN exigible AND tax_line_id IS NOT NULL
+                    THEN debit ELSE 0 END),
+                SUM(CASE WHEN exigible AND tax_line_id IS NOT NULL
+                    THEN credit ELSE 0 END),
+                SUM(CASE WHEN exigible AND tax_line_id IS NOT NULL
+                    THEN balance ELSE 0 END)
+            FROM line_taxes
+            JOIN lines ON lines.id = line_taxes.line_id
+            JOIN account_tax AS at ON at.id = line_taxes.tax_id
+            GROUP BY lines.journal_id, line_taxes.tax_id, at.sequence
+            ORDER BY lines.journal_id, at.sequence, line_taxes.tax_id
+        """.format(
+            exigible_query=exigible_query,
+            from_clause=from_clause,
+            where_clause=where_clause,
+        )
+
+    def _get_journal_tax_lines(self, wizard, moves_data, journal_ids=None):
+        move_ids = [move_data["move_id"] for move_data in moves_data]
+        ml_model = self.env["account.move.line"]
+        domain = self._get_move_lines_domain(move_ids, wizard, journal_ids)
+        ml_model.flush_model(
+            ["journal_id", "tax_line_id", "debit", "credit", "balance"]
+        )
+        from_clause, where_clause, where_params = ml_model._search(domain).get_sql()
+        exigible_query, exigible_params = ml_model._search(
+            domain + ml_model._get_tax_exigible_domain()
+        ).select('"account_move_line".id')
+        self.env.cr.execute(
+            self._get_query_journal_taxes(from_clause, where_clause, exigible_query),
+            exigible_params + where_params,
+        )
+        rows = self.env.cr.fetchall()
+        taxes = self.env["account.tax"].browse({row[1] for row in rows})
+        taxes_data = {tax.id: tax for tax in taxes}
         journals_taxes_data = {}
-        for move_data in moves_data:
-            report_move_lines = move_data["report_move_lines"]
-            for report_move_line in report_move_lines:
-                ml_data = report_move_line
-                tax_ids = []
-                if ml_data["tax_line_id"]:
-                    tax_ids.append(ml_data["tax_line_id"])
-                if ml_data["tax_ids"]:
-                    tax_ids += ml_data["tax_ids"]
-                tax_ids = list(set(tax_ids))
-                journal_id = ml_data["journal_id"]
-                if journal_id not in journals_taxes_data.keys():
-                    journals_taxes_data[journal_id] = {}
-                taxes = self.env["account.tax"].browse(tax_ids)
-                for tax in taxes:
-                    if tax.id not in journals_taxes_data[journal_id]:
-                        journals_taxes_data[journal_id][tax.id] = {
-                            "base_debit": 0.0,
-                            "base_credit": 0.0,
-                            "base_balance": 0.0,
-                            "tax_debit": 0.0,
-                            "tax_credit": 0.0,
-                            "tax_balance": 0.0,
-                            "tax_name": tax.name,
-                            "tax_code": tax.description,
-                        }
-                    field_keys = [
-                        "base_debit",
-                        "base_credit",
-                        "base_balance",
-                        "tax_debit",
-                        "tax_credit",
-                        "tax_balance",
-                    ]
-                    for field_key in field_keys:
-                        journals_taxes_data[journal_id][tax.id][field_key] += ml_data[
-                            field_key
-                        ]
-        journals_taxes_data_2 = {}
-        for journal_id in journals_taxes_data.keys():
-            journals_taxes_data_2[journal_id] = []
-            for tax_id in journals_taxes_data[journal_id].keys():
-                journals_taxes_data_2[journal_id] += [
-                    journals_taxes_data[journal_id][tax_id]
-                ]
-        return journals_taxes_data_2
+        for (
+            journal_id,
+            tax_id,
+            base_debit,
+            base_credit,
+            base_balance,
+            tax_debit,
+            tax_credit,
+            tax_balance,
+        ) in rows:
+            journals_taxes_data.setdefault(journal_id, []).append(
+                {
+                    "base_debit": base_debit,
+                    "base_credit": base_credit,
+                    "base_balance": base_balance,
+                    "tax_debit": tax_debit,
+                    "tax_credit": tax_credit,
+                    "tax_balance": tax_balance,
+                    "tax_name": taxes_data[tax_id].name,
+                    "tax_code": taxes_data[tax_id].description,
+                }
+            )
+        return journals_taxes_data
 
-    def _get_report_values(self, docids, data):
-        wizard_id = data["wizard_id"]
-        wizard = self.env["journal.ledger.report.wizard"].browse(wizard_id)
-        company = self.env["res.company"].browse(data["company_id"])
-        journal_ids = data["journal_ids"]
-        journal_ledgers_data = self._get_journal_ledgers(wizard, journal_ids, company)
+    def _get_journal_ledger_sections(self, wizard, journal_ids):
+        """Return the moves, move lines, lookup tables and tax summaries of
+        the given journals."""
         move_ids, moves_data, move_ids_data = self._get_moves(wizard, journal_ids)
-        journal_moves_data = {}
-        for key, items in itertools.groupby(
-            moves_data, operator.itemgetter("journal_id")
-        ):
-            if key not in journal_moves_data.keys():
-                journal_moves_data[key] = []
-            journal_moves_data[key] += list(items)
         move_lines_data = (
             account_ids_data
-        ) = (
-            partner_ids_data
-        ) = currency_ids_data = tax_line_ids_data = move_line_ids_taxes_data = {}
+        ) = partner_ids_data = currency_ids_data = tax_line_ids_data = {}
         if move_ids:
             move_lines = self._get_move_lines(move_ids, wizard, journal_ids)
             move_lines_data = move_lines[1]
@@ -331,7 +442,130 @@ class JournalLedgerReport(models.AbstractModel):
                 move_data["report_move_lines"] += move_lines_data[move_id]
         journals_taxes_data = {}
         if moves_data:
-            journals_taxes_data = self._get_journal_tax_lines(wizard, moves_data)
+            journals_taxes_data = self._get_journal_tax_lines(
+                wizard, moves_data, journal_ids
+            )
+        return {
+            "moves_data": moves_data,
+            "move_ids_data": move_ids_data,
+            "move_lines_data": move_lines_data,
+            "account_ids_data": account_ids_data,
+            "partner_ids_data": partner_ids_data,
+            "currency_ids_data": currency_ids_data,
+            "tax_line_ids_data": tax_line_ids_data,
+            "journals_taxes_data": journals_taxes_data,
+        }
+
+    def _get_journal_ledger_workers(self, data):
+        """Return the number of threads building the journal sections in
+        parallel, or 0 to build them sequentially.
+
+        The sections of a ledger grouped by journal are independent. Each
+        worker reads them with its own cursor, and so its own connection of
+        the database pool, which is why the mode is opt-in through
+        ``account_financial_report.journal_ledger_workers`` and capped by
+        ``JOURNAL_LEDGER_MAX_WORKERS``. The auto sequence is numbered across
+        all journals, so it requires the sequential mode. Tests share a
+        single cursor, so they do not use threads either.
+        """
+        if (
+            data["group_option"] != "journal"
+            or data["with_auto_sequence"]
+            or len(data["journal_ids"]) < 2
+            or self.env.registry.in_test_mode()
+        ):
+            return 0
+        workers = int(
+            self.env["ir.config_parameter"]
+            .sudo()
+            .get_param("account_financial_report.journal_ledger_workers", 0)
+        )
+        return max(
+            min(workers, JOURNAL_LEDGER_MAX_WORKERS, len(data["journal_ids"])), 0
+        )
+
+    def _has_pending_writes(self):
+        """Return whether the current transaction wrote to the database,
+        as the workers would not see these changes."""
+        self.env.flush_all()
+        self.env.cr.execute("SELECT txid_current_if_assigned()")
+        return self.env.cr.fetchone()[0] is not None
+
+    def _export_snapshot(self):
+        """Return the id of the snapshot of the current transaction, for
+        the workers to read the same data."""
+        self.env.cr.execute("SELECT pg_export_snapshot()")
+        return self.env.cr.fetchone()[0]
+
+    def _get_journal_ledger_section_worker(self, snapshot, wizard_id, journal_id):
+        with self.pool.cursor() as cr:
+            cr.execute("SET TRANSACTION SNAPSHOT %s", (snapshot,))
+            env = api.Environment(cr, self.env.uid, self.env.context, su=self.env.su)
+            wizard = env["journal.ledger.report.wizard"].browse(wizard_id)
+            return env[self._name]._get_journal_ledger_sections(wizard, [journal_id])
+
+    def _merge_journal_ledger_sections(self, journal_sections):
+        """Merge the sections of single journals, in their order, into the
+        sections of all of them."""
+        sections = {"moves_data": []}
+        for journal_section in journal_sections:
+            journal_section = dict(journal_section)
+            sections["moves_data"] += journal_section.pop("moves_data")
+            for key, values in journal_section.items():
+                sections.setdefault(key, {}).update(values)
+        return sections
+
+    def _get_journal_ledger_sections_parallel(self, wizard, journal_ids, workers):
+        """Build the section of each journal in its own thread and merge
+        them in the order of the journals.
+
+        The workers share the snapshot of the current transaction, but
+        cannot see its changes: the sections are built sequentially when
+        the transaction wrote anything, such as the wizard itself.
+        """
+        if self._has_pending_writes():
+            return self._get_journal_ledger_sections(wizard, journal_ids)
+        snapshot = self._export_snapshot()
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            journal_sections = list(
+                executor.map(
+                    lambda journal_id: self._get_journal_ledger_section_worker(
+                        snapshot, wizard.id, journal_id
+                    ),
+                    journal_ids,
+                )
+            )
+        return self._merge_journal_ledger_sections(journal_sections)
+
+    def _get_report_values(self, docids, data):
+        wizard_id = data["wizard_id"]
+        wizard = self.env["journal.ledger.report.wizard"].browse(wizard_id)
+        company = self.env["res.company"].browse(data["company_id"])
+        journal_ids = data["journal_ids"]
+        journal_ledgers_data = self._get_journal_ledgers(wizard, journal_ids, company)
+        workers = self._get_journal_ledger_workers(data)
+        if workers:
+            sections = self._get_journal_ledger_sections_parallel(
+                wizard, journal_ids, workers
+            )
+        else:
+            sections = self._get_journal_ledger_sections(wizard, journal_ids)
+        moves_data = sections["moves_data"]
+        move_ids_data = sections["move_ids_data"]
+        move_lines_data = sections["move_lines_data"]
+        account_ids_data = sections["account_ids_data"]
+        partner_ids_data = sections["partner_ids_data"]
+        currency_ids_data = sections["currency_ids_data"]
+        tax_line_ids_data = sections["tax_line_ids_data"]
+        journals_taxes_data = sections["journals_taxes_data"]
+        move_line_ids_taxes_data = {}
+        journal_moves_data = {}
+        for key, items in itertools.groupby(
+            moves_data, operator.itemgetter("journal_id")
+        ):
+            if key not in journal_moves_data.keys():
+                journal_moves_data[key] = []
+            journal_moves_data[key] += list(items)
         for journal_ledger_data in journal_ledgers_data:
             journal_id = journal_ledger_data["id"]
             journal_ledger_data["tax_lines"] = journals_taxes_data.get(journal_id, [])
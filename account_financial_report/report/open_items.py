@@ -2,8 +2,7 @@
 # Copyright 2020 ForgeFlow S.L. (https://www.forgeflow.com)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
-import operator
-from datetime import date, datetime
+from datetime import datetime
 
 from odoo import api, models
 from odoo.tools import float_is_zero
@@ -14,28 +13,6 @@ class OpenItemsReport(models.AbstractModel):
     _description = "Open Items Report"
     _inherit = "report.account_financial_report.abstract_report"
 
-    def _get_account_partial_reconciled(self, company_id, date_at_object):
-        domain = [("max_date", ">", date_at_object), ("company_id", "=", company_id)]
-        fields = ["debit_move_id", "credit_move_id", "amount"]
-        accounts_partial_reconcile = self.env["account.partial.reconcile"].search_read(
-            domain=domain, fields=fields
-        )
-        debit_amount = {}
-        credit_amount = {}
-        for account_partial_reconcile_data in accounts_partial_reconcile:
-            debit_move_id = account_partial_reconcile_data["debit_move_id"][0]
-            credit_move_id = account_partial_reconcile_data["credit_move_id"][0]
-            if debit_move_id not in debit_amount.keys():
-                debit_amount[debit_move_id] = 0.0
-            debit_amount[debit_move_id] += account_partial_reconcile_data["amount"]
-            if credit_move_id not in credit_amount.keys():
-                credit_amount[credit_move_id] = 0.0
-            credit_amount[credit_move_id] += account_partial_reconcile_data["amount"]
-            account_partial_reconcile_data.update(
-                {"debit_move_id": debit_move_id, "credit_move_id": credit_move_id}
-            )
-        return accounts_partial_reconcile, debit_amount, credit_amount
-
     def _get_data(
         self,
         account_ids,
@@ -45,51 +22,21 @@ class OpenItemsReport(models.AbstractModel):
         company_id,
         date_from,
     ):
-        domain = self._get_move_lines_domain_not_reconciled(
-            company_id, account_ids, partner_ids, only_posted_moves, date_from
-        )
-        ml_fields = self._get_ml_fields()
-        move_lines = self.env["account.move.line"].search_read(
-            domain=domain, fields=ml_fields
+        move_lines = self._get_open_move_lines(
+            company_id,
+            account_ids,
+            partner_ids,
+            date_at_object,
+            date_from,
+            only_posted_moves,
         )
+        open_move_lines = [move_lines.row(pos) for pos in range(len(move_lines))]
         journals_ids = set()
         partners_ids = set()
         partners_data = {}
-        if date_at_object < date.today():
-            (
-                acc_partial_rec,
-                debit_amount,
-                credit_amount,
-            ) = self._get_account_partial_reconciled(company_id, date_at_object)
-            if acc_partial_rec:
-                ml_ids = list(map(operator.itemgetter("id"), move_lines))
-                debit_ids = list(
-                    map(operator.itemgetter("debit_move_id"), acc_partial_rec)
-                )
-                credit_ids = list(
-                    map(operator.itemgetter("credit_move_id"), acc_partial_rec)
-                )
-                move_lines = self._recalculate_move_lines(
-                    move_lines,
-                    debit_ids,
-                    credit_ids,
-                    debit_amount,
-                    credit_amount,
-                    ml_ids,
-                    account_ids,
-                    company_id,
-                    partner_ids,
-                    only_posted_moves,
-                )
-        move_lines = [
-            move_line
-            for move_line in move_lines
-            if move_line["date"] <= date_at_object
-            and not float_is_zero(move_line["amount_residual"], precision_digits=2)
-        ]
 
         open_items_move_lines_data = {}
-        for move_line in move_lines:
+        for move_line in open_move_lines:
             journals_ids.add(move_line["journal_id"][0])
             acc_id = move_line["account_id"][0]
             # Partners data
@@ -155,7 +102,7 @@ class OpenItemsReport(models.AbstractModel):
         journals_data = self._get_journals_data(list(journals_ids))
         accounts_data = self._get_accounts_data(open_items_move_lines_data.keys())
         return (
-            move_lines,
+            open_move_lines,
             partners_data,
             journals_data,
             accounts_data,
@@ -219,20 +166,21 @@ class OpenItemsReport(models.AbstractModel):
         only_posted_moves = data["only_posted_moves"]
         show_partner_details = data["show_partner_details"]
 
-        (
-            move_lines_data,
-            partners_data,
-            journals_data,
-            accounts_data,
-            open_items_move_lines_data,
-        ) = self._get_data(
-            account_ids,
-            partner_ids,
-            date_at_object,
-            only_posted_moves,
-            company_id,
-            date_from,
-        )
+        with self._open_items_cache():
+            (
+                move_lines_data,
+                partners_data,
+                journals_data,
+                accounts_data,
+                open_items_move_lines_data,
+            ) = self._get_data(
+                account_ids,
+                partner_ids,
+                date_at_object,
+                only_posted_moves,
+                company_id,
+                date_from,
+            )
 
         total_amount = self._calculate_amounts(open_items_move_lines_data)
         open_items_move_lines_data = self._order_open_items_by_date(
@@ -255,15 +203,3 @@ class OpenItemsReport(models.AbstractModel):
             "total_amount": total_amount,
             "Open_Items": open_items_move_lines_data,
         }
-
-    def _get_ml_fields(self):
-        return self.COMMON_ML_FIELDS + [
-            "amount_residual",
-            "reconciled",
-            "currency_id",
-            "credit",
-            "date_maturity",
-            "amount_residual_currency",
-            "debit",
-            "amount_currency",
-        ]
@@ -4,7 +4,10 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
 
-from odoo import api, models
+from collections import defaultdict
+
+from odoo import api, fields, models
+from odoo.osv import expression
 from odoo.tools.float_utils import float_is_zero
 
 
@@ -170,30 +173,141 @@ class TrialBalanceReport(models.AbstractModel):
             ]
         return domain
 
-    def _get_pl_initial_balance(
+    def _get_ml_data(self, domains, show_partner_details):
+        """Sum the move lines of several domains in a single table scan.
+
+        ``domains`` maps an aggregate name to a move line domain. One row is
+        returned per account (and per partner if ``show_partner_details``)
+        holding, for each aggregate, the number of matching lines and their
+        sums, keyed ``<name>_count``, ``<name>_debit``, ``<name>_credit``,
+        ``<name>_balance`` and ``<name>_amount_currency``.
+        """
+        ml_model = self.env["account.move.line"]
+        query = ml_model._search(expression.OR(list(domains.values())))
+        from_clause, where_clause, where_params = query.get_sql()
+        groupby = "account_id, partner_id" if show_partner_details else "account_id"
+        flags = []
+        flags_params = []
+        aggregates = []
+        for name, domain in domains.items():
+            dummy, flag_clause, flag_params = ml_model._where_calc(domain).get_sql()
+            flags.append('({}) AS "{}"'.format(flag_clause, name))
+            flags_params += flag_params
+            aggregates.append(
+                'COUNT(*) FILTER (WHERE "{0}") AS "{0}_count"'.format(name)
+            )
+            for fname in ("debit", "credit", "balance", "amount_currency"):
+                aggregates.append(
+                    'COALESCE(SUM({1}) FILTER (WHERE "{0}"), 0.0) AS "{0}_{1}"'.format(
+                        name, fname
+                    )
+                )
+        query_str = """
+            SELECT {groupby}, {aggregates}
+            FROM (
+                SELECT "account_move_line".account_id,
+                    "account_move_line".partner_id,
+                    "account_move_line".debit,
+                    "account_move_line".credit,
+                    "account_move_line".balance,
+                    "account_move_line".amount_currency,
+                    {flags}
+                FROM {from_clause}
+                WHERE {where_clause}
+            ) AS ml
+            GROUP BY {groupby}
+        """.format(
+            groupby=groupby,
+            aggregates=", ".join(aggregates),
+            flags=", ".join(flags),
+            from_clause=from_clause,
+            where_clause=where_clause,
+        )
+        self.env.cr.execute(query_str, flags_params + where_params)
+        return self.env.cr.dictfetchall()
+
+    def _get_monthly_ml_data(
         self,
         account_ids,
         journal_ids,
         partner_ids,
         company_id,
+        cutoff,
         fy_start_date,
-        only_posted_moves,
         show_partner_details,
-        foreign_currency,
     ):
-        domain = self._get_initial_balance_fy_pl_ml_domain(
-            account_ids,
-            journal_ids,
-            partner_ids,
-            company_id,
-            fy_start_date,
-            only_posted_moves,
-            show_partner_details,
-        )
-        initial_balances = self.env["account.move.line"].read_group(
-            domain=domain,
-            fields=["account_id", "balance", "amount_currency:sum"],
-            groupby=["account_id"],
+        """Return the initial and fiscal year P&L balances of the posted
+        items dated before ``cutoff`` from the monthly balances, as rows
+        shaped like the ones of _get_ml_data."""
+        accounts_domain = [("company_id", "=", company_id)]
+        if account_ids:
+            accounts_domain += [("id", "in", account_ids)]
+        if show_partner_details:
+            accounts_domain += [
+                ("account_type", "in", ["asset_receivable", "liability_payable"])
+            ]
+        accounts = self.env["account.account"].search(accounts_domain)
+        bs_ids = accounts.filtered("include_initial_balance").ids
+        pl_ids = (accounts - accounts.filtered("include_initial_balance")).ids
+        groupby = ("account_id",)
+        if show_partner_details:
+            groupby += ("partner_id",)
+        fy_start_date = fields.Date.to_date(fy_start_date)
+        ml_data = []
+        for name, acc_ids, month_from, month_to in (
+            ("initial", bs_ids, False, cutoff),
+            ("initial", pl_ids, fy_start_date, cutoff),
+            ("fy_pl", pl_ids, False, fy_start_date),
+        ):
+            balances = self._get_monthly_balances(
+                company_id,
+                acc_ids,
+                month_to,
+                month_from=month_from,
+                journal_ids=journal_ids,
+                partner_ids=partner_ids,
+                groupby=groupby,
+            )
+            for balance in balances:
+                row = {fname: balance.pop(fname) for fname in groupby}
+                row["%s_count" % name] = balance.pop("line_count")
+                for fname, value in balance.items():
+                    row["{}_{}".format(name, fname)] = value
+                ml_data.append(row)
+        return ml_data
+
+    @api.model
+    def _get_ml_amounts(self, ml_data, name, fnames, show_partner_details=False):
+        """Return the ``name`` aggregate of rows from _get_ml_data as dicts
+        shaped like read_group results, one per account (and per partner if
+        ``show_partner_details``) having lines in that aggregate."""
+        groups = {}
+        for row in ml_data:
+            if not row.get("%s_count" % name):
+                continue
+            prt_id = row["partner_id"] if show_partner_details else False
+            group = groups.setdefault(
+                (row["account_id"], prt_id), dict.fromkeys(fnames, 0.0)
+            )
+            for fname in fnames:
+                group[fname] += row["{}_{}".format(name, fname)]
+        partner_names = {}
+        if show_partner_details:
+            partners = self.env["res.partner"].browse(
+                {prt_id for dummy, prt_id in groups if prt_id}
+            )
+            partner_names = dict(partners.name_get())
+        res = []
+        for (acc_id, prt_id), group in groups.items():
+            group["account_id"] = acc_id
+            if show_partner_details:
+                group["partner_id"] = prt_id and (prt_id, partner_names[prt_id])
+            res.append(group)
+        return res
+
+    def _get_pl_initial_balance(self, ml_data, foreign_currency):
+        initial_balances = self._get_ml_amounts(
+            ml_data, "fy_pl", ["balance", "amount_currency"]
         )
         pl_initial_balance = 0.0
         pl_initial_currency_balance = 0.0
@@ -210,7 +324,7 @@ class TrialBalanceReport(models.AbstractModel):
         self, total_amount, tb_initial_acc, tb_period_acc, foreign_currency
     ):
         for tb in tb_period_acc:
-            acc_id = tb["account_id"][0]
+            acc_id = tb["account_id"]
             total_amount[acc_id] = self._prepare_total_amount(tb, foreign_currency)
             total_amount[acc_id]["credit"] = tb["credit"]
             total_amount[acc_id]["debit"] = tb["debit"]
@@ -277,7 +391,7 @@ class TrialBalanceReport(models.AbstractModel):
         partners_ids = set()
         partners_data = {}
         for tb in tb_period_prt:
-            acc_id = tb["account_id"][0]
+            acc_id = tb["account_id"]
             if tb["partner_id"]:
                 prt_id = tb["partner_id"][0]
                 if tb["partner_id"] not in partners_ids:
@@ -293,7 +407,7 @@ class TrialBalanceReport(models.AbstractModel):
                 total_amount[acc_id][prt_id]["initial_balance"] = 0.0
                 partners_ids.add(tb["partner_id"])
         for tb in tb_initial_prt:
-            acc_id = tb["account_id"][0]
+            acc_id = tb["account_id"]
             if tb["partner_id"]:
                 prt_id = tb["partner_id"][0]
                 if tb["partner_id"] not in partners_ids:
@@ -355,11 +469,16 @@ class TrialBalanceReport(models.AbstractModel):
             # don't include unaffected earnings account
             unaffected_earnings_account = False
         accounts = self.env["account.account"].search(accounts_domain)
-        tb_initial_acc = []
-        for account in accounts:
-            tb_initial_acc.append(
-                {"account_id": account.id, "balance": 0.0, "amount_currency": 0.0}
-            )
+        # Initial balances indexed by account id, so that each grouped row
+        # is merged with a single lookup.
+        tb_initial_acc = {
+            account_id: {
+                "account_id": account_id,
+                "balance": 0.0,
+                "amount_currency": 0.0,
+            }
+            for account_id in accounts.ids
+        }
         initial_domain_bs = self._get_initial_balances_bs_ml_domain(
             account_ids,
             journal_ids,
@@ -369,11 +488,6 @@ class TrialBalanceReport(models.AbstractModel):
             only_posted_moves,
             show_partner_details,
         )
-        tb_initial_acc_bs = self.env["account.move.line"].read_group(
-            domain=initial_domain_bs,
-            fields=["account_id", "balance", "amount_currency:sum"],
-            groupby=["account_id"],
-        )
         initial_domain_pl = self._get_initial_balances_pl_ml_domain(
             account_ids,
             journal_ids,
@@ -384,26 +498,6 @@ class TrialBalanceReport(models.AbstractModel):
             show_partner_details,
             fy_start_date,
         )
-        tb_initial_acc_pl = self.env["account.move.line"].read_group(
-            domain=initial_domain_pl,
-            fields=["account_id", "balance", "amount_currency:sum"],
-            groupby=["account_id"],
-        )
-        tb_initial_acc_rg = tb_initial_acc_bs + tb_initial_acc_pl
-        for account_rg in tb_initial_acc_rg:
-            element = list(
-                filter(
-                    lambda acc_dict: acc_dict["account_id"]
-                    == account_rg["account_id"][0],
-                    tb_initial_acc,
-                )
-            )
-            if element:
-                element[0]["balance"] += account_rg["balance"]
-                element[0]["amount_currency"] += account_rg["amount_currency"]
-        if hide_account_at_0:
-            tb_initial_acc = [p for p in tb_initial_acc if p["balance"] != 0]
-
         period_domain = self._get_period_ml_domain(
             account_ids,
             journal_ids,
@@ -414,39 +508,64 @@ class TrialBalanceReport(models.AbstractModel):
             only_posted_moves,
             show_partner_details,
         )
-        tb_period_acc = self.env["account.move.line"].read_group(
-            domain=period_domain,
-            fields=["account_id", "debit", "credit", "balance", "amount_currency:sum"],
-            groupby=["account_id"],
+        fy_pl_domain = self._get_initial_balance_fy_pl_ml_domain(
+            account_ids,
+            journal_ids,
+            partner_ids,
+            company_id,
+            fy_start_date,
+            only_posted_moves,
+            show_partner_details,
         )
-
-        if show_partner_details:
-            tb_initial_prt_bs = self.env["account.move.line"].read_group(
-                domain=initial_domain_bs,
-                fields=["account_id", "partner_id", "balance", "amount_currency:sum"],
-                groupby=["account_id", "partner_id"],
-                lazy=False,
+        initial_domain = expression.OR([initial_domain_bs, initial_domain_pl])
+        cutoff = self._get_monthly_balance_cutoff(date_from, fy_start_date)
+        if cutoff:
+            # The posted items before the cutoff are read from the monthly
+            # balances, only the remaining ones are summed here.
+            initial_domain = expression.AND(
+                [initial_domain, self._get_monthly_balance_tail_domain(cutoff)]
+            )
+            fy_pl_domain = expression.AND(
+                [fy_pl_domain, [("parent_state", "!=", "posted")]]
             )
-            tb_initial_prt_pl = self.env["account.move.line"].read_group(
-                domain=initial_domain_pl,
-                fields=["account_id", "partner_id", "balance", "amount_currency:sum"],
-                groupby=["account_id", "partner_id"],
+        ml_data = self._get_ml_data(
+            {
+                "initial": initial_domain,
+                "period": period_domain,
+                "fy_pl": fy_pl_domain,
+            },
+            show_partner_details,
+        )
+        if cutoff:
+            ml_data += self._get_monthly_ml_data(
+                account_ids,
+                journal_ids,
+                partner_ids,
+                company_id,
+                cutoff,
+                fy_start_date,
+                show_partner_details,
+            )
+        initial_fnames = ["balance", "amount_currency"]
+        period_fnames = ["debit", "credit", "balance", "amount_currency"]
+        tb_initial_acc_rg = self._get_ml_amounts(ml_data, "initial", initial_fnames)
+        for account_rg in tb_initial_acc_rg:
+            element = tb_initial_acc.get(account_rg["account_id"])
+            if element:
+                element["balance"] += account_rg["balance"]
+                element["amount_currency"] += account_rg["amount_currency"]
+        tb_initial_acc = list(tb_initial_acc.values())
+        if hide_account_at_0:
+            tb_initial_acc = [p for p in tb_initial_acc if p["balance"] != 0]
+        tb_period_acc = self._get_ml_amounts(ml_data, "period", period_fnames)
+        if show_partner_details:
+            tb_initial_prt = self._get_ml_amounts(
+                ml_data, "initial", initial_fnames, show_partner_details=True
             )
-            tb_initial_prt = tb_initial_prt_bs + tb_initial_prt_pl
             if hide_account_at_0:
                 tb_initial_prt = [p for p in tb_initial_prt if p["balance"] != 0]
-            tb_period_prt = self.env["account.move.line"].read_group(
-                domain=period_domain,
-                fields=[
-                    "account_id",
-                    "partner_id",
-                    "debit",
-                    "credit",
-                    "balance",
-                    "amount_currency:sum",
-                ],
-                groupby=["account_id", "partner_id"],
-                lazy=False,
+            tb_period_prt = self._get_ml_amounts(
+                ml_data, "period", period_fnames, show_partner_details=True
             )
         total_amount = {}
         partners_data = []
@@ -480,16 +599,7 @@ class TrialBalanceReport(models.AbstractModel):
         (
             pl_initial_balance,
             pl_initial_currency_balance,
-        ) = self._get_pl_initial_balance(
-            account_ids,
-            journal_ids,
-            partner_ids,
-            company_id,
-            fy_start_date,
-            only_posted_moves,
-            show_partner_details,
-            foreign_currency,
-        )
+        ) = self._get_pl_initial_balance(ml_data, foreign_currency)
         if unaffected_id:
             total_amount[unaffected_id]["ending_balance"] += pl_initial_balance
             total_amount[unaffected_id]["initial_balance"] += pl_initial_balance
@@ -611,6 +721,13 @@ class TrialBalanceReport(models.AbstractModel):
     def _get_computed_groups_data(self, accounts_data, total_amount, foreign_currency):
         groups = self.env["account.group"].search([("id", "!=", False)])
         groups_data = {}
+        # Account ids indexed by code prefix, one index per prefix length
+        accounts_by_prefix = defaultdict(lambda: defaultdict(list))
+        for len_group_code in set(len(group.code_prefix_start) for group in groups):
+            for account in accounts_data.values():
+                accounts_by_prefix[len_group_code][
+                    account["code"][:len_group_code]
+                ].append(account["id"])
         for group in groups:
             len_group_code = len(group.code_prefix_start)
             groups_data.update(
@@ -635,26 +752,26 @@ class TrialBalanceReport(models.AbstractModel):
             if foreign_currency:
                 groups_data[group.id]["initial_currency_balance"] = 0.0
                 groups_data[group.id]["ending_currency_balance"] = 0.0
-            for account in accounts_data.values():
-                if group.code_prefix_start == account["code"][:len_group_code]:
-                    acc_id = account["id"]
-                    group_id = group.id
-                    groups_data[group_id]["initial_balance"] += total_amount[acc_id][
-                        "initial_balance"
-                    ]
-                    groups_data[group_id]["debit"] += total_amount[acc_id]["debit"]
-                    groups_data[group_id]["credit"] += total_amount[acc_id]["credit"]
-                    groups_data[group_id]["balance"] += total_amount[acc_id]["balance"]
-                    groups_data[group_id]["ending_balance"] += total_amount[acc_id][
-                        "ending_balance"
-                    ]
-                    if foreign_currency:
-                        groups_data[group_id][
-                            "initial_currency_balance"
-                        ] += total_amount[acc_id]["initial_currency_balance"]
-                        groups_data[group_id][
-                            "ending_currency_balance"
-                        ] += total_amount[acc_id]["ending_currency_balance"]
+            for acc_id in accounts_by_prefix[len_group_code].get(
+                group.code_prefix_start, []
+            ):
+                group_id = group.id
+                groups_data[group_id]["initial_balance"] += total_amount[acc_id][
+                    "initial_balance"
+                ]
+                groups_data[group_id]["debit"] += total_amount[acc_id]["debit"]
+                groups_data[group_id]["credit"] += total_amount[acc_id]["credit"]
+                groups_data[group_id]["balance"] += total_amount[acc_id]["balance"]
+                groups_data[group_id]["ending_balance"] += total_amount[acc_id][
+                    "ending_balance"
+                ]
+                if foreign_currency:
+                    groups_data[group_id]["initial_currency_balance"] += total_amount[
+                        acc_id
+                    ]["initial_currency_balance"]
+                    groups_data[group_id]["ending_currency_balance"] += total_amount[
+                        acc_id
+                    ]["ending_currency_balance"]
         return groups_data
 
     def _get_report_values(self, docids, data):
@@ -2,8 +2,6 @@
 # Copyright 2020 ForgeFlow S.L. (https://www.forgeflow.com)
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
-import operator
-
 from odoo import api, models
 
 
@@ -56,46 +54,95 @@ class VATReport(models.AbstractModel):
             domain += [("move_id.state", "in", ["posted", "draft"])]
         return domain
 
-    def _get_vat_report_data(self, company_id, date_from, date_to, only_posted_moves):
-        tax_domain = self._get_tax_report_domain(
-            company_id, date_from, date_to, only_posted_moves
+    def _get_vat_report_query(self, company_id, date_from, date_to, only_posted_moves):
+        """Return the query and parameters of the net and tax amounts of the
+        period, one row per tax with the columns ``tax_id``, ``net`` and
+        ``tax``.
+
+        The amounts are summed by the database: the tax lines by
+        ``tax_line_id`` and the base lines by their taxes in
+        ``account_move_line_account_tax_rel``.
+        """
+        aml_model = self.env["account.move.line"]
+        aml_model.flush_model(["balance", "tax_line_id", "tax_ids"])
+        tax_query = aml_model._search(
+            self._get_tax_report_domain(
+                company_id, date_from, date_to, only_posted_moves
+            )
         )
-        ml_fields = self._get_ml_fields_vat_report()
-        tax_move_lines = self.env["account.move.line"].search_read(
-            domain=tax_domain,
-            fields=ml_fields,
+        tax_from, tax_where, tax_params = tax_query.get_sql()
+        net_query = aml_model._search(
+            self._get_net_report_domain(
+                company_id, date_from, date_to, only_posted_moves
+            )
         )
-        net_domain = self._get_net_report_domain(
-            company_id, date_from, date_to, only_posted_moves
+        net_from, net_where, net_params = net_query.get_sql()
+        query = """
+            SELECT tax_id, SUM(net) AS net, SUM(tax) AS tax
+            FROM (
+                SELECT "account_move_line".tax_line_id AS tax_id,
+                    0.0 AS net, SUM("account_move_line".balance) AS tax
+                FROM {tax_from}
+                WHERE {tax_where}
+                GROUP BY 1
+                UNION ALL
+                SELECT rel.account_tax_id, SUM("account_move_line".balance), 0.0
+                FROM {net_from}
+                JOIN account_move_line_account_tax_rel rel
+                    ON rel.account_move_line_id = "account_move_line".id
+                WHERE {net_where}
+                GROUP BY 1
+            ) vat
+            GROUP BY tax_id
+        """.format(
+            tax_from=tax_from,
+            tax_where=tax_where,
+            net_from=net_from,
+            net_where=net_where,
         )
-        taxed_move_lines = self.env["account.move.line"].search_read(
-            domain=net_domain,
-            fields=ml_fields,
+        return query, tax_params + net_params
+
+    def _get_vat_report_data(self, company_id, date_from, date_to, only_posted_moves):
+        """Return the net and tax amounts of every tax with activity in the
+        period, one row per tax (no longer one per move line), and the data
+        of these taxes."""
+        query, params = self._get_vat_report_query(
+            company_id, date_from, date_to, only_posted_moves
         )
-        taxed_move_lines = list(filter(lambda d: d["tax_ids"], taxed_move_lines))
-        vat_data = []
-        for tax_move_line in tax_move_lines:
-            vat_data.append(
-                {
-                    "net": 0.0,
-                    "tax": tax_move_line["balance"],
-                    "tax_line_id": tax_move_line["tax_line_id"][0],
-                }
-            )
-        for taxed_move_line in taxed_move_lines:
-            for tax_id in taxed_move_line["tax_ids"]:
-                vat_data.append(
-                    {
-                        "net": taxed_move_line["balance"],
-                        "tax": 0.0,
-                        "tax_line_id": tax_id,
-                    }
-                )
-        tax_ids = list(map(operator.itemgetter("tax_line_id"), vat_data))
-        tax_ids = list(set(tax_ids))
-        tax_data = self._get_tax_data(tax_ids)
+        self.env.cr.execute(query, params)
+        vat_data = [
+            {"net": net, "tax": tax, "tax_line_id": tax_id}
+            for tax_id, net, tax in self.env.cr.fetchall()
+        ]
+        tax_data = self._get_tax_data([row["tax_line_id"] for row in vat_data])
         return vat_data, tax_data
 
+    def _get_vat_report_rows(
+        self, company_id, date_from, date_to, only_posted_moves, based_on
+    ):
+        """Return the rows of _get_vat_report_data under their tax group (or
+        each of their tax tags, depending on ``based_on``) in ``key_id``, and
+        the data of the taxes. Group taxes are left out, their children are
+        reported instead.
+
+        The tags of a tax are the tags of its invoice repartition lines.
+        """
+        vat_data, tax_data = self._get_vat_report_data(
+            company_id, date_from, date_to, only_posted_moves
+        )
+        rows = []
+        for vat_row in vat_data:
+            tax = tax_data[vat_row["tax_line_id"]]
+            if tax["amount_type"] == "group":
+                continue
+            if based_on == "taxgroups":
+                key_ids = [tax["tax_group_id"]]
+            else:
+                key_ids = tax["tags_ids"]
+            rows += [dict(vat_row, key_id=key_id) for key_id in key_ids]
+        rows.sort(key=lambda row: (row["key_id"], row["tax_line_id"]))
+        return rows, tax_data
+
     def _get_tax_group_data(self, tax_group_ids):
         tax_groups = self.env["account.tax.group"].browse(tax_group_ids)
         tax_group_data = {}
@@ -111,44 +158,10 @@ class VATReport(models.AbstractModel):
             )
         return tax_group_data
 
-    def _get_vat_report_group_data(self, vat_report_data, tax_data, tax_detail):
-        vat_report = {}
-        for tax_move_line in vat_report_data:
-            tax_id = tax_move_line["tax_line_id"]
-            if tax_data[tax_id]["amount_type"] == "group":
-                pass
-            else:
-                tax_group_id = tax_data[tax_id]["tax_group_id"]
-                if tax_group_id not in vat_report.keys():
-                    vat_report[tax_group_id] = {}
-                    vat_report[tax_group_id]["net"] = 0.0
-                    vat_report[tax_group_id]["tax"] = 0.0
-                    vat_report[tax_group_id][tax_id] = dict(tax_data[tax_id])
-                    vat_report[tax_group_id][tax_id].update({"net": 0.0, "tax": 0.0})
-                else:
-                    if tax_id not in vat_report[tax_group_id].keys():
-                        vat_report[tax_group_id][tax_id] = dict(tax_data[tax_id])
-                        vat_report[tax_group_id][tax_id].update(
-                            {"net": 0.0, "tax": 0.0}
-                        )
-                vat_report[tax_group_id]["net"] += tax_move_line["net"]
-                vat_report[tax_group_id]["tax"] += tax_move_line["tax"]
-                vat_report[tax_group_id][tax_id]["net"] += tax_move_line["net"]
-                vat_report[tax_group_id][tax_id]["tax"] += tax_move_line["tax"]
-        tax_group_data = self._get_tax_group_data(vat_report.keys())
-        vat_report_list = []
-        for tax_group_id in vat_report.keys():
-            vat_report[tax_group_id]["name"] = tax_group_data[tax_group_id]["name"]
-            vat_report[tax_group_id]["code"] = tax_group_data[tax_group_id]["code"]
-            if tax_detail:
-                vat_report[tax_group_id]["taxes"] = []
-                for tax_id in vat_report[tax_group_id]:
-                    if isinstance(tax_id, int):
-                        vat_report[tax_group_id]["taxes"].append(
-                            vat_report[tax_group_id][tax_id]
-                        )
-            vat_report_list.append(vat_report[tax_group_id])
-        return vat_report_list
+    def _get_vat_report_group_data(self, vat_report_rows, tax_data, tax_detail):
+        vat_report = self._get_vat_report_by_key(vat_report_rows, tax_data)
+        tax_group_data = self._get_tax_group_data(list(vat_report.keys()))
+        return self._get_vat_report_list(vat_report, tax_group_data, tax_detail)
 
     def _get_tags_data(self, tags_ids):
         tags = self.env["account.account.tag"].browse(tags_ids)
@@ -157,43 +170,34 @@ class VATReport(models.AbstractModel):
             tags_data.update({tag.id: {"code": "", "name": tag.name}})
         return tags_data
 
-    def _get_vat_report_tag_data(self, vat_report_data, tax_data, tax_detail):
+    def _get_vat_report_tag_data(self, vat_report_rows, tax_data, tax_detail):
+        vat_report = self._get_vat_report_by_key(vat_report_rows, tax_data)
+        tags_data = self._get_tags_data(list(vat_report.keys()))
+        return self._get_vat_report_list(vat_report, tags_data, tax_detail)
+
+    def _get_vat_report_by_key(self, vat_report_rows, tax_data):
+        """Gather the rows of _get_vat_report_rows by tax group or tag, with
+        their totals and the amounts of each of their taxes."""
         vat_report = {}
-        for tax_move_line in vat_report_data:
-            tax_id = tax_move_line["tax_line_id"]
-            tags_ids = tax_data[tax_id]["tags_ids"]
-            if tax_data[tax_id]["amount_type"] == "group":
-                continue
-            else:
-                if tags_ids:
-                    for tag_id in tags_ids:
-                        if tag_id not in vat_report.keys():
-                            vat_report[tag_id] = {}
-                            vat_report[tag_id]["net"] = 0.0
-                            vat_report[tag_id]["tax"] = 0.0
-                            vat_report[tag_id][tax_id] = dict(tax_data[tax_id])
-                            vat_report[tag_id][tax_id].update({"net": 0.0, "tax": 0.0})
-                        else:
-                            if tax_id not in vat_report[tag_id].keys():
-                                vat_report[tag_id][tax_id] = dict(tax_data[tax_id])
-                                vat_report[tag_id][tax_id].update(
-                                    {"net": 0.0, "tax": 0.0}
-                                )
-                        vat_report[tag_id][tax_id]["net"] += tax_move_line["net"]
-                        vat_report[tag_id][tax_id]["tax"] += tax_move_line["tax"]
-                        vat_report[tag_id]["net"] += tax_move_line["net"]
-                        vat_report[tag_id]["tax"] += tax_move_line["tax"]
-        tags_data = self._get_tags_data(vat_report.keys())
+        for row in vat_report_rows:
+            key_report = vat_report.setdefault(
+                row["key_id"], {"net": 0.0, "tax": 0.0, "taxes": []}
+            )
+            key_report["net"] += row["net"]
+            key_report["tax"] += row["tax"]
+            tax = dict(tax_data[row["tax_line_id"]])
+            tax.update({"net": row["net"], "tax": row["tax"]})
+            key_report["taxes"].append(tax)
+        return vat_report
+
+    def _get_vat_report_list(self, vat_report, keys_data, tax_detail):
         vat_report_list = []
-        for tag_id in vat_report.keys():
-            vat_report[tag_id]["name"] = tags_data[tag_id]["name"]
-            vat_report[tag_id]["code"] = tags_data[tag_id]["code"]
-            if tax_detail:
-                vat_report[tag_id]["taxes"] = []
-                for tax_id in vat_report[tag_id]:
-                    if isinstance(tax_id, int):
-                        vat_report[tag_id]["taxes"].append(vat_report[tag_id][tax_id])
-            vat_report_list.append(vat_report[tag_id])
+        for key_id, key_report in vat_report.items():
+            key_report["name"] = keys_data[key_id]["name"]
+            key_report["code"] = keys_data[key_id]["code"]
+            if not tax_detail:
+                del key_report["taxes"]
+            vat_report_list.append(key_report)
         return vat_report_list
 
     def _get_report_values(self, docids, data):
@@ -205,16 +209,16 @@ class VATReport(models.AbstractModel):
         based_on = data["based_on"]
         tax_detail = data["tax_detail"]
         only_posted_moves = data["only_posted_moves"]
-        vat_report_data, tax_data = self._get_vat_report_data(
-            company_id, date_from, date_to, only_posted_moves
+        vat_report_rows, tax_data = self._get_vat_report_rows(
+            company_id, date_from, date_to, only_posted_moves, based_on
         )
         if based_on == "taxgroups":
             vat_report = self._get_vat_report_group_data(
-                vat_report_data, tax_data, tax_detail
+                vat_report_rows, tax_data, tax_detail
             )
         else:
             vat_report = self._get_vat_report_tag_data(
-                vat_report_data, tax_data, tax_detail
+                vat_report_rows, tax_data, tax_detail
             )
         return {
             "doc_ids": [wizard_id],
@@ -228,12 +232,3 @@ class VATReport(models.AbstractModel):
             "tax_detail": data["tax_detail"],
             "vat_report": vat_report,
         }
-
-    def _get_ml_fields_vat_report(self):
-        return [
-            "id",
-            "tax_base_amount",
-            "balance",
-            "tax_line_id",
-            "tax_ids",
-        ]
@@ -7,3 +7,4 @@ from . import test_journal_ledger
 from . import test_open_items
 from . import test_trial_balance
 from . import test_vat_report
+from . import test_benchmark
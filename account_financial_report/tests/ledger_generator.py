@@ -0,0 +1,162 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+import random
+from datetime import timedelta
+
+from odoo.fields import Date
+
+
+class LedgerGenerator:
+    """Seedable generator of a synthetic ledger for the report benchmarks.
+
+    The same seed always produces the same partners, documents, amounts,
+    dates and reconciliations, so that the timings of two commits are
+    measured on identical data. The documents mimic a usual activity:
+    customer invoices and refunds, vendor bills and refunds with taxes,
+    fully or partially paid by bank entries, and a few draft documents.
+    """
+
+    def __init__(self, env, seed=0, batch_size=200):
+        self.env = env
+        self.random = random.Random(seed)
+        self.batch_size = batch_size
+
+    def create_partners(self, count):
+        return self.env["res.partner"].create(
+            [{"name": "Benchmark Partner %05d" % i} for i in range(count)]
+        )
+
+    def _random_date(self, date_from, date_to):
+        days = (date_to - date_from).days
+        return date_from + timedelta(days=self.random.randint(0, days))
+
+    def _prepare_invoice(self, company_data, partners, date_from, date_to):
+        move_type = self.random.choices(
+            ["out_invoice", "out_refund", "in_invoice", "in_refund"],
+            weights=[55, 5, 37, 3],
+        )[0]
+        if move_type.startswith("out_"):
+            journal = company_data["default_journal_sale"]
+            account = company_data["default_account_revenue"]
+            tax = company_data["default_tax_sale"]
+        else:
+            journal = company_data["default_journal_purchase"]
+            account = company_data["default_account_expense"]
+            tax = company_data["default_tax_purchase"]
+        date = self._random_date(date_from, date_to)
+        return {
+            "move_type": move_type,
+            "partner_id": self.random.choice(partners).id,
+            "journal_id": journal.id,
+            "invoice_date": date,
+            "date": date,
+            "invoice_date_due": date + timedelta(days=self.random.choice([0, 30, 60])),
+            "invoice_line_ids": [
+                (
+                    0,
+                    0,
+                    {
+                        "name": "Benchmark line",
+                        "quantity": self.random.randint(1, 10),
+                        "price_unit": round(self.random.lognormvariate(4, 1.2), 2),
+                        "account_id": account.id,
+                        "tax_ids": [(6, 0, tax.ids)],
+                    },
+                )
+                for dummy in range(self.random.randint(1, 5))
+            ],
+        }
+
+    def _prepare_payment(self, company_data, invoice, date_to):
+        """Return the values of a bank entry paying all or part of the
+        invoice, and the receivable or payable line it pays."""
+        line = invoice.line_ids.filtered(
+            lambda ml: ml.account_id.account_type
+            in ("asset_receivable", "liability_payable")
+        )[:1]
+        partial = self.random.random() < 0.2
+        amount = line.balance
+        if partial:
+            amount = round(amount * self.random.uniform(0.2, 0.8), 2)
+        date = min(
+            invoice.invoice_date + timedelta(days=self.random.randint(0, 90)), date_to
+        )
+        bank_account = company_data["default_journal_bank"].default_account_id
+        return (
+            {
+                "move_type": "entry",
+                "journal_id": company_data["default_journal_bank"].id,
+                "date": date,
+                "line_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "name": "Benchmark payment",
+                            "account_id": line.account_id.id,
+                            "partner_id": line.partner_id.id,
+                            "balance": -amount,
+                        },
+                    ),
+                    (
+                        0,
+                        0,
+                        {
+                            "name": "Benchmark payment",
+                            "account_id": bank_account.id,
+                            "balance": amount,
+                        },
+                    ),
+                ],
+            },
+            line,
+        )
+
+    def generate(
+        self,
+        company_data,
+        partners,
+        line_count,
+        date_from,
+        date_to,
+        paid_rate=0.7,
+        draft_rate=0.05,
+    ):
+        """Create documents in the company until about ``line_count`` journal
+        items exist, and return the number of items created."""
+        date_from = Date.to_date(date_from)
+        date_to = Date.to_date(date_to)
+        env = self.env(context=dict(self.env.context, tracking_disable=True))
+        move_model = env["account.move"].with_company(company_data["company"])
+        created = 0
+        while created < line_count:
+            invoices = move_model.create(
+                [
+                    self._prepare_invoice(company_data, partners, date_from, date_to)
+                    for dummy in range(self.batch_size)
+                ]
+            )
+            to_post = invoices.filtered(lambda m: self.random.random() >= draft_rate)
+            to_post.action_post()
+            payments_vals = []
+            lines_to_pay = []
+            for invoice in to_post:
+                if self.random.random() < paid_rate:
+                    payment_vals, line = self._prepare_payment(
+                        company_data, invoice, date_to
+                    )
+                    payments_vals.append(payment_vals)
+                    lines_to_pay.append(line)
+            payments = move_model.create(payments_vals)
+            payments.action_post()
+            for payment, line in zip(payments, lines_to_pay):
+                (
+                    line
+                    + payment.line_ids.filtered(
+                        lambda ml: ml.account_id == line.account_id
+                    )
+                ).reconcile()
+            created += len(invoices.line_ids) + len(payments.line_ids)
+            invoices.invalidate_recordset()
+            payments.invalidate_recordset()
+        return created
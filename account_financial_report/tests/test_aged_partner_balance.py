@@ -1,6 +1,9 @@
 #  Copyright 2021 Simone Rubino - Agile Business Group
 #  License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
+from datetime import date
+
+from odoo.exceptions import UserError
 from odoo.tests import TransactionCase
 from odoo.tools import DEFAULT_SERVER_DATE_FORMAT, test_reports
 
@@ -32,3 +35,76 @@ class TestAgedPartnerBalance(TransactionCase):
             data=data,
         )
         self.assertTrue(result)
+
+    def test_aging_buckets(self):
+        """Check that each line is aged in the right bucket."""
+        report_model = self.env["report.account_financial_report.aged_partner_balance"]
+        date_at = date(2023, 6, 30)
+        due_dates = [
+            False,
+            date(2023, 7, 15),
+            date(2023, 6, 30),
+            date(2023, 6, 29),
+            date(2023, 5, 31),
+            date(2023, 5, 30),
+            date(2023, 3, 2),
+            date(2023, 3, 1),
+        ]
+        bucket_indexes = report_model._get_aging_bucket_indexes(due_dates, date_at)
+        self.assertEqual(bucket_indexes, [0, 0, 0, 1, 1, 2, 4, 5])
+        totals = report_model._sum_aging_buckets(
+            ["a", "b", "a", "a", "b", "a", "a", "a"],
+            bucket_indexes,
+            [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0],
+        )
+        self.assertEqual(totals["a"], [4.0, 4.0, 6.0, 0.0, 7.0, 8.0])
+        self.assertEqual(totals["b"], [2.0, 5.0, 0.0, 0.0, 0.0, 0.0])
+
+    def test_report_intervals(self):
+        """Check that the report uses the configured intervals."""
+        config = self.env["account.age.report.configuration"].create(
+            {
+                "name": "Weekly",
+                "line_ids": [
+                    (0, 0, {"name": "1 - 7 d.", "days": 7}),
+                    (0, 0, {"name": "8 - 14 d.", "days": 14}),
+                ],
+            }
+        )
+        wizard = self.wizard_model.create(
+            {"receivable_accounts_only": True, "age_partner_config_id": config.id}
+        )
+        wizard.onchange_type_accounts_only()
+        data = wizard._prepare_report_aged_partner_balance()
+        data.update({"date_at": data["date_at"].strftime(DEFAULT_SERVER_DATE_FORMAT)})
+        report_model = self.env["report.account_financial_report.aged_partner_balance"]
+        res_data = report_model._get_report_values(wizard.ids, data)
+        self.assertEqual(
+            [column["field"] for column in res_data["aging_columns"]],
+            ["current", "7_days", "14_days", "older"],
+        )
+        bucket_indexes = report_model.with_context(
+            age_partner_config_id=config.id
+        )._get_aging_bucket_indexes(
+            [date(2023, 6, 23), date(2023, 6, 22), date(2023, 6, 15)],
+            date(2023, 6, 30),
+        )
+        self.assertEqual(bucket_indexes, [1, 2, 3])
+
+    def test_report_intervals_company(self):
+        """Check that the intervals of another company cannot be used."""
+        other_company = self.env["res.company"].create({"name": "Other company"})
+        config = self.env["account.age.report.configuration"].create(
+            {
+                "name": "Other company intervals",
+                "company_id": other_company.id,
+                "line_ids": [(0, 0, {"name": "1 - 7 d.", "days": 7})],
+            }
+        )
+        with self.assertRaises(UserError):
+            self.wizard_model.create(
+                {
+                    "company_id": self.env.company.id,
+                    "age_partner_config_id": config.id,
+                }
+            )
@@ -0,0 +1,176 @@
+# License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
+
+import json
+import logging
+import os
+import time
+
+from odoo.tests import tagged
+
+from odoo.addons.account.tests.common import AccountTestInvoicingCommon
+
+from .ledger_generator import LedgerGenerator
+
+_logger = logging.getLogger(__name__)
+
+
+@tagged("post_install", "-at_install", "-standard", "afr_benchmark")
+class TestReportBenchmark(AccountTestInvoicingCommon):
+    """Time the report engines on a synthetic ledger.
+
+    This test is not part of the standard suite, run it with
+    ``--test-tags afr_benchmark``. The ledger is configured with the
+    environment variables ``AFR_BENCHMARK_LINES`` (journal items per
+    company, 10000 by default), ``AFR_BENCHMARK_COMPANIES`` (1),
+    ``AFR_BENCHMARK_PARTNERS`` (200) and ``AFR_BENCHMARK_SEED`` (0).
+    The duration and number of queries of ``_get_report_values`` and of the
+    XLSX writer of every report are logged, and written as JSON to the file
+    named by ``AFR_BENCHMARK_OUTPUT`` if set, tagged with
+    ``AFR_BENCHMARK_LABEL`` (e.g. a commit hash) to compare runs.
+    """
+
+    @classmethod
+    def setUpClass(cls, chart_template_ref=None):
+        super().setUpClass(chart_template_ref=chart_template_ref)
+        cls.config = {
+            "lines": int(os.environ.get("AFR_BENCHMARK_LINES", 10000)),
+            "companies": int(os.environ.get("AFR_BENCHMARK_COMPANIES", 1)),
+            "partners": int(os.environ.get("AFR_BENCHMARK_PARTNERS", 200)),
+            "seed": int(os.environ.get("AFR_BENCHMARK_SEED", 0)),
+        }
+        cls.date_from = "2023-01-01"
+        cls.date_to = "2023-12-31"
+        generator = LedgerGenerator(cls.env, seed=cls.config["seed"])
+        partners = generator.create_partners(cls.config["partners"])
+        companies_data = [cls.company_data] + [
+            cls.setup_company_data("Benchmark Company %s" % i)
+            for i in range(1, cls.config["companies"])
+        ]
+        cls.config["generated_lines"] = 0
+        for company_data in companies_data:
+            cls.config["generated_lines"] += generator.generate(
+                company_data, partners, cls.config["lines"], "2022-01-01", cls.date_to
+            )
+        cls.env.flush_all()
+
+    def _get_reports(self):
+        company = self.company_data["company"]
+        partner_accounts = (
+            self.company_data["default_account_receivable"]
+            + self.company_data["default_account_payable"]
+        )
+        period = {
+            "company_id": company.id,
+            "date_from": self.date_from,
+            "date_to": self.date_to,
+        }
+        at_date = {
+            "company_id": company.id,
+            "date_at": self.date_to,
+            "account_ids": [(6, 0, partner_accounts.ids)],
+        }
+        return [
+            (
+                "general_ledger",
+                "general.ledger.report.wizard",
+                period,
+                "_prepare_report_general_ledger",
+                "general_ledger",
+            ),
+            (
+                "journal_ledger",
+                "journal.ledger.report.wizard",
+                period,
+                "_prepare_report_journal_ledger",
+                "Journal_Ledgers",
+            ),
+            (
+                "trial_balance",
+                "trial.balance.report.wizard",
+                period,
+                "_prepare_report_trial_balance",
+                "trial_balance",
+            ),
+            (
+                "open_items",
+                "open.items.report.wizard",
+                at_date,
+                "_prepare_report_open_items",
+                "Open_Items",
+            ),
+            (
+                "aged_partner_balance",
+                "aged.partner.balance.report.wizard",
+                dict(at_date, show_move_line_details=True),
+                "_prepare_report_aged_partner_balance",
+                "aged_partner_balance",
+            ),
+            (
+                "vat_report",
+                "vat.report.wizard",
+                # The taxes of the test chart have groups, but no tags
+                dict(period, based_on="taxgroups"),
+                "_prepare_vat_report",
+                "vat_report",
+            ),
+        ]
+
+    def _measure(self, report, output, func):
+        self.env.flush_all()
+        self.env.invalidate_all()
+        queries = self.env.cr.sql_log_count
+        start = time.perf_counter()
+        value = func()
+        result = {
+            "report": report,
+            "output": output,
+            "seconds": round(time.perf_counter() - start, 4),
+            "queries": self.env.cr.sql_log_count - queries,
+        }
+        _logger.info("Benchmark %s", result)
+        return result, value
+
+    def test_benchmark(self):
+        results = []
+        for (
+            report,
+            wizard_model,
+            wizard_vals,
+            prepare_method,
+            data_key,
+        ) in self._get_reports():
+            wizard = self.env[wizard_model].create(wizard_vals)
+            # The report data goes through JSON on its way from the wizard
+            # to the report engines
+            data = json.loads(
+                json.dumps(getattr(wizard, prepare_method)(), default=str)
+            )
+            report_model = self.env["report.account_financial_report.%s" % report]
+            xlsx_model = self.env["report.a_f_r.report_%s_xlsx" % report]
+            result, values = self._measure(
+                report,
+                "values",
+                lambda: report_model._get_report_values(wizard.ids, data),
+            )
+            results.append(result)
+            # The synthetic ledger has activity in every report
+            self.assertTrue(values[data_key], report)
+            result, (content, _report_type) = self._measure(
+                report,
+                "xlsx",
+                lambda: xlsx_model.create_xlsx_report(wizard.ids, data),
+            )
+            results.append(result)
+            self.assertTrue(content, report)
+        output = os.environ.get("AFR_BENCHMARK_OUTPUT")
+        if output:
+            with open(output, "w") as output_file:
+                json.dump(
+                    {
+                        "label": os.environ.get("AFR_BENCHMARK_LABEL", ""),
+                        "config": self.config,
+                        "results": results,
+                    },
+                    output_file,
+                    indent=2,
+                )
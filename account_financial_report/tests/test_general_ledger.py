@@ -677,6 +677,98 @@ class TestGeneralLedgerReport(AccountTestInvoicingCommon):
         self.assertEqual(unaffected_fin_balance["credit"], 1000)
         self.assertEqual(unaffected_fin_balance["balance"], 500)
 
+    def test_05_period_lines_read_by_chunks(self):
+        # Read the period lines one by one to cover several chunks
+        self.env["ir.config_parameter"].sudo().set_param(
+            "account_financial_report.move_line_chunk_size", 1
+        )
+        for move_date in [self.fy_date_start, self.fy_date_end]:
+            self._add_move(
+                date=move_date,
+                receivable_debit=1000,
+                receivable_credit=0,
+                income_debit=0,
+                income_credit=1000,
+            )
+        res_data = self._get_report_lines()
+        general_ledger = res_data["general_ledger"]
+        income_fin_balance = self._get_final_balance(
+            self.income_account.id, general_ledger
+        )
+        self.assertEqual(income_fin_balance["debit"], 0)
+        self.assertEqual(income_fin_balance["credit"], 2000)
+        self.assertEqual(income_fin_balance["balance"], -2000)
+        income_account = [
+            account
+            for account in general_ledger
+            if account["id"] == self.income_account.id
+        ][0]
+        self.assertEqual(len(income_account["move_lines"]), 2)
+
+    def test_06_cumul_balance(self):
+        self._add_move(
+            date=self.previous_fy_date_end,
+            receivable_debit=1000,
+            receivable_credit=0,
+            income_debit=0,
+            income_credit=1000,
+        )
+        for move_date in [self.fy_date_end, self.fy_date_start]:
+            self._add_move(
+                date=move_date,
+                receivable_debit=500,
+                receivable_credit=0,
+                income_debit=0,
+                income_credit=500,
+            )
+        res_data = self._get_report_lines(with_partners=True)
+        general_ledger = res_data["general_ledger"]
+        receivable_account = [
+            account
+            for account in general_ledger
+            if account["id"] == self.receivable_account.id
+        ][0]
+        move_lines = receivable_account["list_grouped"][0]["move_lines"]
+        self.assertEqual(
+            [ml["date"] for ml in move_lines], [self.fy_date_start, self.fy_date_end]
+        )
+        self.assertEqual([ml["balance"] for ml in move_lines], [1500, 2000])
+        income_account = [
+            account
+            for account in general_ledger
+            if account["id"] == self.income_account.id
+        ][0]
+        self.assertEqual(
+            [ml["balance"] for ml in income_account["move_lines"]], [-500, -1000]
+        )
+
+    def test_07_centralized_account(self):
+        self.income_account.centralized = True
+        for move_date in ["2016-01-05", "2016-01-20", "2016-03-10"]:
+            self._add_move(
+                date=fields.Date.from_string(move_date),
+                receivable_debit=1000,
+                receivable_credit=0,
+                income_debit=0,
+                income_credit=1000,
+            )
+        res_data = self._get_report_lines()
+        general_ledger = res_data["general_ledger"]
+        income_account = [
+            account
+            for account in general_ledger
+            if account["id"] == self.income_account.id
+        ][0]
+        move_lines = income_account["move_lines"]
+        self.assertEqual(len(move_lines), 2)
+        self.assertEqual(
+            [ml["date"] for ml in move_lines],
+            [date(2016, 1, 31), date(2016, 3, 31)],
+        )
+        self.assertEqual([ml["credit"] for ml in move_lines], [2000, 1000])
+        self.assertEqual([ml["balance"] for ml in move_lines], [-2000, -3000])
+        self.assertEqual(income_account["fin_bal"]["balance"], -3000)
+
     def test_partner_filter(self):
         partner_1 = self.env.ref("base.res_partner_1")
         partner_2 = self.env.ref("base.res_partner_2")
@@ -3,6 +3,7 @@
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
 from datetime import datetime
+from unittest.mock import patch
 
 from dateutil.relativedelta import relativedelta
 
@@ -271,3 +272,231 @@ class TestJournalReport(AccountTestInvoicingCommon):
 
         self.check_report_journal_debit_credit(res_data, 250, 250)
         self.check_report_journal_debit_credit_taxes(res_data, 300, 0, 50, 0)
+
+    def test_04_move_lines_chunks(self):
+        today_date = Date.today()
+        moves = self.MoveObj
+        for amount in [10, 20, 30]:
+            moves |= self._add_move(today_date, self.journal_sale, 0, amount, amount, 0)
+        wiz = self.JournalLedgerReportWizard.create(
+            {
+                "date_from": self.fy_date_start,
+                "date_to": self.fy_date_end,
+                "company_id": self.company.id,
+                "journal_ids": [(6, 0, self.journal_sale.ids)],
+                "move_target": "all",
+                "with_auto_sequence": True,
+            }
+        )
+        data = wiz._prepare_report_journal_ledger()
+        expected = {
+            move.id: {
+                "auto_sequence": str(len(moves) - 1 - index).zfill(6),
+                "lines": sorted(
+                    (line.id, line.account_id.id, line.debit, line.credit)
+                    for line in move.line_ids
+                ),
+            }
+            for index, move in enumerate(moves.sorted("id"))
+        }
+        # The second move is read across two chunks
+        for chunk_size in [10000, 3]:
+            self.env["ir.config_parameter"].sudo().set_param(
+                "account_financial_report.move_line_chunk_size", chunk_size
+            )
+            res_data = self.JournalLedgerReport._get_report_values(wiz, data)
+            self.check_report_journal_debit_credit(res_data, 60, 60)
+            result = {
+                move_data["move_id"]: {
+                    "auto_sequence": move_data["report_move_lines"][0]["auto_sequence"],
+                    "lines": sorted(
+                        (
+                            line["move_line_id"],
+                            line["account_id"],
+                            line["debit"],
+                            line["credit"],
+                        )
+                        for line in move_data["report_move_lines"]
+                    ),
+                }
+                for move_data in res_data["Moves"]
+            }
+            self.assertEqual(result, expected)
+
+        # The record based hook returns the values of the report
+        line = moves[0].line_ids[0]
+        report_line = next(
+            report_line
+            for move_data in res_data["Moves"]
+            for report_line in move_data["report_move_lines"]
+            if report_line["move_line_id"] == line.id
+        )
+        self.assertEqual(
+            self.JournalLedgerReport._get_move_lines_data(
+                line, wiz, {}, int(report_line["auto_sequence"]), True
+            ),
+            report_line,
+        )
+
+        # An override of the record based hook is called by the report
+        report_class = type(self.JournalLedgerReport)
+        get_move_lines_data = report_class._get_move_lines_data
+
+        def _get_move_lines_data(report, ml, *args):
+            ml_data = get_move_lines_data(report, ml, *args)
+            ml_data["move_line_ref"] = ml.move_id.name
+            return ml_data
+
+        with patch.object(report_class, "_get_move_lines_data", _get_move_lines_data):
+            res_data = self.JournalLedgerReport._get_report_values(wiz, data)
+        for move_data in res_data["Moves"]:
+            for line_data in move_data["report_move_lines"]:
+                self.assertEqual(line_data["move_line_ref"], move_data["entry"])
+        self.check_report_journal_debit_credit(res_data, 60, 60)
+
+    def test_05_journal_taxes_order(self):
+        self.tax_20_s.sequence = 10
+        move_form = Form(
+            self.env["account.move"].with_context(default_move_type="out_invoice")
+        )
+        move_form.partner_id = self.partner_2
+        move_form.journal_id = self.journal_sale
+        with move_form.invoice_line_ids.new() as line_form:
+            line_form.name = "test"
+            line_form.quantity = 1.0
+            line_form.price_unit = 100
+            line_form.account_id = self.income_account
+            line_form.tax_ids.add(self.tax_15_s)
+        with move_form.invoice_line_ids.new() as line_form:
+            line_form.name = "test"
+            line_form.quantity = 1.0
+            line_form.price_unit = 100
+            line_form.account_id = self.income_account
+            line_form.tax_ids.add(self.tax_15_s)
+            line_form.tax_ids.add(self.tax_20_s)
+        invoice = move_form.save()
+        invoice.action_post()
+
+        wiz = self.JournalLedgerReportWizard.create(
+            {
+                "date_from": self.fy_date_start,
+                "date_to": self.fy_date_end,
+                "company_id": self.company.id,
+                "journal_ids": [(6, 0, self.journal_sale.ids)],
+                "move_target": "all",
+            }
+        )
+        data = wiz._prepare_report_journal_ledger()
+        res_data = self.JournalLedgerReport._get_report_values(wiz, data)
+        # The taxes are summed by journal in the order of their sequence
+        self.assertEqual(
+            [
+                (
+                    tax_line["tax_name"],
+                    tax_line["base_debit"],
+                    tax_line["base_credit"],
+                    tax_line["tax_debit"],
+                    tax_line["tax_credit"],
+                )
+                for tax_line in res_data["Journal_Ledgers"][0]["tax_lines"]
+            ],
+            [
+                (self.tax_20_s.name, 0, 100, 0, 20),
+                (self.tax_15_s.name, 0, 200, 0, 30),
+            ],
+        )
+
+    def test_06_merge_journal_sections(self):
+        today_date = Date.today()
+        journals = self.journal_sale | self.journal_purchase
+        for journal in journals:
+            for amount in [10, 20]:
+                self._add_move(today_date, journal, 0, amount, amount, 0)
+        wiz = self.JournalLedgerReportWizard.create(
+            {
+                "date_from": self.fy_date_start,
+                "date_to": self.fy_date_end,
+                "company_id": self.company.id,
+                "journal_ids": [(6, 0, journals.ids)],
+                "move_target": "all",
+                "group_option": "journal",
+            }
+        )
+        # The threads would not see the moves created by the transaction
+        self.assertTrue(self.JournalLedgerReport._has_pending_writes())
+
+        def journal_moves(sections):
+            moves = {}
+            for move_data in sections.pop("moves_data"):
+                moves.setdefault(move_data["journal_id"], []).append(
+                    move_data["move_id"]
+                )
+            # The auto sequence is not used when the journals are split
+            for move_lines in sections["move_lines_data"].values():
+                for move_line in move_lines:
+                    del move_line["auto_sequence"]
+            return moves
+
+        sections = self.JournalLedgerReport._get_journal_ledger_sections(
+            wiz, journals.ids
+        )
+        merged_sections = self.JournalLedgerReport._merge_journal_ledger_sections(
+            [
+                self.JournalLedgerReport._get_journal_ledger_sections(wiz, [journal_id])
+                for journal_id in journals.ids
+            ]
+        )
+        self.assertEqual(journal_moves(merged_sections), journal_moves(sections))
+        self.assertEqual(merged_sections, sections)
+        self.assertEqual(len(sections["move_lines_data"]), 4)
+
+    def test_07_parallel_journal_sections(self):
+        today_date = Date.today()
+        journals = self.journal_sale | self.journal_purchase
+        for journal in journals:
+            for amount in [10, 20]:
+                self._add_move(today_date, journal, 0, amount, amount, 0)
+        wiz = self.JournalLedgerReportWizard.create(
+            {
+                "date_from": self.fy_date_start,
+                "date_to": self.fy_date_end,
+                "company_id": self.company.id,
+                "journal_ids": [(6, 0, journals.ids)],
+                "move_target": "all",
+                "group_option": "journal",
+            }
+        )
+        data = wiz._prepare_report_journal_ledger()
+
+        def report_values():
+            res_data = self.JournalLedgerReport._get_report_values(wiz, data)
+            # The auto sequence is not used when the journals are split
+            for move_data in res_data["Moves"]:
+                for line_data in move_data["report_move_lines"]:
+                    del line_data["auto_sequence"]
+            res_data["Moves"].sort(key=lambda move_data: move_data["move_id"])
+            return res_data
+
+        sequential_values = report_values()
+        report_class = type(self.JournalLedgerReport)
+        worker_journal_ids = []
+
+        def _get_journal_ledger_section_worker(report, snapshot, wizard_id, journal_id):
+            # The test cursor cannot be shared, so the worker reads with it,
+            # one journal at a time
+            worker_journal_ids.append(journal_id)
+            return report._get_journal_ledger_sections(
+                report.env["journal.ledger.report.wizard"].browse(wizard_id),
+                [journal_id],
+            )
+
+        with patch.multiple(
+            report_class,
+            _get_journal_ledger_workers=lambda report, data: 1,
+            _has_pending_writes=lambda report: False,
+            _export_snapshot=lambda report: "snapshot",
+            _get_journal_ledger_section_worker=_get_journal_ledger_section_worker,
+        ):
+            parallel_values = report_values()
+        self.assertEqual(sorted(worker_journal_ids), sorted(journals.ids))
+        self.assertEqual(parallel_values, sequential_values)
@@ -2,6 +2,7 @@
 # Copyright 2016 Camptocamp SA
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl.html).
 
+from odoo import fields
 from odoo.tests import tagged
 
 from odoo.addons.account.tests.common import AccountTestInvoicingCommon
@@ -29,3 +30,142 @@ class TestOpenItems(AccountTestInvoicingCommon):
 
         wizard = self.env["open.items.report.wizard"].with_context(**context)
         self.assertEqual(wizard._default_partners(), expected_list)
+
+    def test_move_line_store(self):
+        invoice = self.init_invoice(
+            "out_invoice", amounts=[100.0, 250.0], post=True, taxes=self.tax_sale_a
+        )
+        report = self.env["report.account_financial_report.open_items"]
+        fields = report._get_ml_fields()
+        domain = [("move_id", "=", invoice.id)]
+        move_lines = report._get_move_lines_store(domain, fields, order="id")
+        expected = self.env["account.move.line"].search_read(domain, fields, order="id")
+        self.assertEqual(len(move_lines), len(expected))
+        self.assertEqual(list(move_lines), expected)
+        receivable_line = invoice.line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        self.assertEqual(
+            move_lines.get("amount_residual", move_lines.index[receivable_line.id]),
+            invoice.amount_total,
+        )
+
+    def test_open_items_cache(self):
+        invoice = self.init_invoice("out_invoice", amounts=[100.0], post=True)
+        receivable_line = invoice.line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        args = (
+            invoice.company_id.id,
+            receivable_line.account_id.ids,
+            [],
+            fields.Date.today(),
+            False,
+            True,
+        )
+        open_items = self.env["report.account_financial_report.open_items"]
+        aged = self.env["report.account_financial_report.aged_partner_balance"]
+        with open_items._open_items_cache():
+            move_lines = open_items._get_open_move_lines(*args)
+            self.assertIn(receivable_line.id, move_lines.columns["id"])
+            with aged._open_items_cache():
+                self.assertIs(aged._get_open_move_lines(*args), move_lines)
+            self.assertIs(open_items._get_open_move_lines(*args), move_lines)
+        # The open move lines are forgotten at the end of the outer block
+        self.assertIsNot(open_items._get_open_move_lines(*args), move_lines)
+
+    def test_open_move_lines_at_date(self):
+        invoice = self.init_invoice(
+            "out_invoice", invoice_date="2023-01-10", amounts=[100.0], post=True
+        )
+        self.env["account.payment.register"].with_context(
+            active_model="account.move", active_ids=invoice.ids
+        ).create({"payment_date": "2023-02-10"})._create_payments()
+        open_invoice = self.init_invoice(
+            "out_invoice", invoice_date="2023-01-12", amounts=[50.0], post=True
+        )
+        receivable_line = invoice.line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        open_receivable_line = open_invoice.line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        self.assertTrue(receivable_line.reconciled)
+        report = self.env["report.account_financial_report.open_items"]
+        for date_at, date_from, expected in [
+            (
+                "2023-01-31",
+                False,
+                {
+                    receivable_line.id: invoice.amount_total,
+                    open_receivable_line.id: open_invoice.amount_total,
+                },
+            ),
+            (
+                fields.Date.today(),
+                False,
+                {open_receivable_line.id: open_invoice.amount_total},
+            ),
+            # The lines reconciled after the date are not filtered on the
+            # start date, the lines still open are
+            ("2023-01-31", "2023-01-12", {receivable_line.id: invoice.amount_total}),
+        ]:
+            move_lines = report._get_open_move_lines(
+                invoice.company_id.id,
+                receivable_line.account_id.ids,
+                invoice.partner_id.ids,
+                fields.Date.to_date(date_at),
+                date_from,
+                True,
+            )
+            residuals = dict(
+                zip(move_lines.columns["id"], move_lines.columns["amount_residual"])
+            )
+            self.assertEqual(residuals, expected)
+
+    def test_open_items_snapshot(self):
+        self.env["ir.config_parameter"].set_param(
+            "account_financial_report.open_items_snapshot_months", 12
+        )
+        invoice = self.init_invoice(
+            "out_invoice", invoice_date="2023-01-10", amounts=[100.0], post=True
+        )
+        self.env["account.payment.register"].with_context(
+            active_model="account.move", active_ids=invoice.ids
+        ).create({"payment_date": "2023-02-10"})._create_payments()
+        receivable_line = invoice.line_ids.filtered(
+            lambda line: line.account_id.account_type == "asset_receivable"
+        )
+        company = invoice.company_id
+        date_at = fields.Date.to_date("2023-01-31")
+        snapshot_model = self.env["account.open.item.snapshot"]
+        snapshot = snapshot_model._create_snapshot(company, date_at)
+        self.assertEqual(
+            snapshot.line_ids.filtered(
+                lambda line: line.move_line_id == receivable_line
+            ).residual,
+            invoice.amount_total,
+        )
+        report = self.env["report.account_financial_report.open_items"]
+        args = (
+            company.id,
+            receivable_line.account_id.ids,
+            invoice.partner_id.ids,
+            date_at,
+            False,
+            True,
+        )
+        self.assertEqual(report._get_open_move_lines_query(*args)[1][0], snapshot.id)
+        move_lines = report._get_open_move_lines(*args)
+        self.assertEqual(list(move_lines.columns["id"]), receivable_line.ids)
+        self.assertEqual(move_lines.get("amount_residual", 0), invoice.amount_total)
+        # An item posted after the date of the snapshot leaves it valid, an
+        # item posted on or before it does not
+        self.init_invoice(
+            "out_invoice", invoice_date="2023-02-20", amounts=[50.0], post=True
+        )
+        self.assertTrue(snapshot.exists())
+        self.init_invoice(
+            "out_invoice", invoice_date="2023-01-20", amounts=[50.0], post=True
+        )
+        self.assertFalse(snapshot.exists())
@@ -155,6 +155,7 @@ class TestTrialBalanceReport(AccountTestInvoicingCommon):
         }
         move = self.env["account.move"].create(move_vals)
         move.action_post()
+        return move
 
     def _get_report_lines(
         self, with_partners=False, account_ids=False, show_hierarchy=False
@@ -665,3 +666,58 @@ class TestTrialBalanceReport(AccountTestInvoicingCommon):
         self.assertEqual(total_initial_balance, 0)
         self.assertEqual(total_final_balance, 0)
         self.assertEqual(total_debit, total_credit)
+
+    def test_05_monthly_balance(self):
+        def get_receivable_balance():
+            self.env["account.monthly.balance"]._merge_rows()
+            return self.env["account.monthly.balance"].search(
+                [
+                    ("account_id", "=", self.account100.id),
+                    ("month", "=", "2015-03-01"),
+                ]
+            )
+
+        move = self._add_move(
+            "2015-03-10",
+            receivable_debit=1000,
+            receivable_credit=0,
+            income_debit=0,
+            income_credit=1000,
+        )
+        receivable_balance = get_receivable_balance()
+        self.assertEqual(receivable_balance.line_count, 1)
+        self.assertEqual(receivable_balance.debit, 1000)
+        self.assertEqual(receivable_balance.balance, 1000)
+        move.button_draft()
+        self.assertEqual(get_receivable_balance().line_count, 0)
+        self.assertEqual(get_receivable_balance().balance, 0)
+        move.date = "2015-04-10"
+        move.action_post()
+        self.assertEqual(get_receivable_balance().line_count, 0)
+        # The initial balance mixes the monthly balances of the previous
+        # months with the posted items of the current month
+        self._add_move(
+            "2016-01-05",
+            receivable_debit=250,
+            receivable_credit=0,
+            income_debit=0,
+            income_credit=250,
+        )
+        trial_balance = self.env["trial.balance.report.wizard"].create(
+            {
+                "date_from": "2016-01-20",
+                "date_to": self.date_end,
+                "target_move": "posted",
+                "hide_account_at_0": True,
+                "company_id": self.env.user.company_id.id,
+                "fy_start_date": self.fy_date_start,
+            }
+        )
+        data = trial_balance._prepare_report_trial_balance()
+        res_data = self.env[
+            "report.account_financial_report.trial_balance"
+        ]._get_report_values(trial_balance, data)
+        receivable_lines = self._get_account_lines(
+            self.account100.id, res_data["trial_balance"]
+        )
+        self.assertEqual(receivable_lines["initial_balance"], 1250)
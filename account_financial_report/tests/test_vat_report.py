@@ -385,3 +385,129 @@ class TestVATReport(AccountTestInvoicingCommon):
         wizard.button_export_html()
         wizard.button_export_pdf()
         wizard.button_export_xlsx()
+
+    def _create_invoice(self, line_taxes):
+        invoice = self.env["account.move"].create(
+            {
+                "move_type": "out_invoice",
+                "partner_id": self.partner_a.id,
+                "invoice_date": time.strftime("%Y-%m-05"),
+                "invoice_line_ids": [
+                    (
+                        0,
+                        0,
+                        {
+                            "name": "Test",
+                            "account_id": self.income_account.id,
+                            "quantity": 1,
+                            "price_unit": price_unit,
+                            "tax_ids": [(6, 0, taxes.ids)],
+                        },
+                    )
+                    for price_unit, taxes in line_taxes
+                ],
+            }
+        )
+        invoice.action_post()
+        return invoice
+
+    def test_02_several_taxes_per_line(self):
+        # The two tax repartition lines share the same tag
+        tax_split = self.env["account.tax"].create(
+            {
+                "name": "Tax 15.0% split",
+                "amount": 15.0,
+                "amount_type": "percent",
+                "type_tax_use": "sale",
+                "company_id": self.company.id,
+                "tax_group_id": self.tax_group_20.id,
+                "invoice_repartition_line_ids": [
+                    (0, 0, {"factor_percent": 100, "repartition_type": "base"}),
+                ]
+                + [
+                    (
+                        0,
+                        0,
+                        {
+                            "factor_percent": 50,
+                            "repartition_type": "tax",
+                            "account_id": self.tax_account.id,
+                            "tag_ids": [(6, 0, [self.tax_tag_03.id])],
+                        },
+                    )
+                ]
+                * 2,
+                "refund_repartition_line_ids": [
+                    (0, 0, {"factor_percent": 100, "repartition_type": "base"}),
+                ]
+                + [
+                    (
+                        0,
+                        0,
+                        {
+                            "factor_percent": 50,
+                            "repartition_type": "tax",
+                            "account_id": self.tax_account.id,
+                        },
+                    )
+                ]
+                * 2,
+            }
+        )
+        self._create_invoice([(1000.0, self.tax_10 | self.tax_20), (200.0, tax_split)])
+
+        vat_report = self._get_report_lines()["vat_report"]
+        self.assertEqual(
+            self._get_tag_or_group_line(self.tax_tag_01.name, vat_report),
+            (-1100, -110),
+        )
+        self.assertEqual(
+            self._get_tag_or_group_line(self.tax_tag_02.name, vat_report),
+            (-2350, -360),
+        )
+        self.assertEqual(
+            self._get_tag_or_group_line(self.tax_tag_03.name, vat_report),
+            (-1450, -280),
+        )
+        self.assertEqual(self._get_tax_line(tax_split.name, vat_report), (-200, -30))
+
+        vat_report = self._get_report_lines(taxgroups=True)["vat_report"]
+        self.assertEqual(
+            self._get_tag_or_group_line(self.tax_group_10.name, vat_report),
+            (-1100, -110),
+        )
+        self.assertEqual(
+            self._get_tag_or_group_line(self.tax_group_20.name, vat_report),
+            (-1450, -280),
+        )
+        self.assertEqual(
+            self._get_tax_line(self.tax_10.name, vat_report), (-1100, -110)
+        )
+        self.assertEqual(
+            self._get_tax_line(self.tax_20.name, vat_report), (-1250, -250)
+        )
+
+    def test_03_group_taxes_excluded(self):
+        tax_group_group = self.env["account.tax.group"].create(
+            {"name": "Group of taxes", "sequence": 3}
+        )
+        group_tax = self.env["account.tax"].create(
+            {
+                "name": "Group of Tax 10.0%",
+                "amount_type": "group",
+                "type_tax_use": "sale",
+                "company_id": self.company.id,
+                "tax_group_id": tax_group_group.id,
+                "children_tax_ids": [(6, 0, self.tax_10.ids)],
+            }
+        )
+        self._create_invoice([(500.0, group_tax)])
+
+        for taxgroups in [False, True]:
+            vat_report = self._get_report_lines(taxgroups=taxgroups)["vat_report"]
+            self.assertFalse(self.check_tax_in_report(group_tax.name, vat_report))
+            self.assertFalse(
+                self.check_tag_or_group_in_report(tax_group_group.name, vat_report)
+            )
+            # The tax lines of the group are reported under its child
+            self.assertEqual(self._get_tax_line(self.tax_10.name, vat_report)[1], -60)
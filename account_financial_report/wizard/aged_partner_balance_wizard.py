@@ -12,6 +12,7 @@ class AgedPartnerBalanceWizard(models.TransientModel):
     _name = "aged.partner.balance.report.wizard"
     _description = "Aged Partner Balance Wizard"
     _inherit = "account_financial_report_abstract_wizard"
+    _check_company_auto = True
 
     date_at = fields.Date(required=True, default=fields.Date.context_today)
     date_from = fields.Date()
@@ -31,6 +32,12 @@ class AgedPartnerBalanceWizard(models.TransientModel):
     payable_accounts_only = fields.Boolean()
     partner_ids = fields.Many2many(comodel_name="res.partner", string="Filter partners")
     show_move_line_details = fields.Boolean()
+    age_partner_config_id = fields.Many2one(
+        comodel_name="account.age.report.configuration",
+        string="Intervals configuration",
+        help="Intervals of the report, instead of 30, 60, 90 and 120 days.",
+        check_company=True,
+    )
 
     account_code_from = fields.Many2one(
         comodel_name="account.account",
@@ -139,6 +146,7 @@ class AgedPartnerBalanceWizard(models.TransientModel):
             "account_ids": self.account_ids.ids,
             "partner_ids": self.partner_ids.ids,
             "show_move_line_details": self.show_move_line_details,
+            "age_partner_config_id": self.age_partner_config_id.id,
             "account_financial_report_lang": self.env.lang,
         }
 
@@ -5,6 +5,21 @@ import logging
 
 from psycopg2 import sql
 
+# Financial types of the journal entries by order of precedence: an entry
+# gets the first type of an account type it has items on, when the balance
+# compares to zero with the operator. pre_init_hook compares the balance of
+# each item, AccountMove._compute_financial_type the total balance of the
+# items of the account type.
+FINANCIAL_TYPE_MAPPING = [
+    ("liquidity", "asset_cash", False),
+    ("liquidity", "liability_credit_card", False),
+    ("payable", "liability_payable", "<"),
+    ("payable_refund", "liability_payable", ">="),
+    ("receivable", "asset_receivable", ">"),
+    ("receivable_refund", "asset_receivable", "<="),
+    ("other", False, False),
+]
+
 
 def pre_init_hook(cr):
     """Precreate financial_type and fill with appropriate values to prevent
@@ -17,16 +32,7 @@ def pre_init_hook(cr):
     cr.execute(
         "ALTER TABLE account_move ADD COLUMN IF NOT EXISTS financial_type VARCHAR"
     )
-    MAPPING = [
-        ("liquidity", "asset_cash", False),
-        ("liquidity", "liability_credit_card", False),
-        ("payable", "liability_payable", "AND aml.balance < 0"),
-        ("payable_refund", "liability_payable", "AND aml.balance >= 0"),
-        ("receivable", "asset_receivable", "AND aml.balance > 0"),
-        ("receivable_refund", "asset_receivable", "AND aml.balance <= 0"),
-        ("other", False, False),
-    ]
-    for financial_type, account_type, extra_where in MAPPING:
+    for financial_type, account_type, balance_operator in FINANCIAL_TYPE_MAPPING:
         args = [financial_type]
         query = sql.SQL("UPDATE account_move am SET financial_type = %s")
         if account_type:
@@ -41,7 +47,7 @@ def pre_init_hook(cr):
             args.append(account_type)
         else:
             query += sql.SQL("WHERE am.financial_type IS NULL")
-        if extra_where:
-            query += sql.SQL(extra_where)
+        if balance_operator:
+            query += sql.SQL("AND aml.balance {} 0").format(sql.SQL(balance_operator))
         cr.execute(query, tuple(args))
         logger.info("%s move set to type %s", financial_type, cr.rowcount)
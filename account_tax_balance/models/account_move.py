@@ -1,8 +1,19 @@
 # Copyright 2016 Antonio Espinosa <antonio.espinosa@tecnativa.com>
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
+import operator
+
 from odoo import _, api, fields, models
 
+from ..hooks import FINANCIAL_TYPE_MAPPING
+
+BALANCE_OPERATORS = {
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
 
 class AccountMove(models.Model):
     _inherit = "account.move"
@@ -25,29 +36,56 @@ class AccountMove(models.Model):
         readonly=True,
     )
 
-    @api.depends("line_ids.account_id.account_type", "line_ids.balance")
-    def _compute_financial_type(self):
-        def _balance_get(line_ids, account_type):
-            return sum(
-                line_ids.filtered(
-                    lambda x: x.account_id.account_type == account_type
-                ).mapped("balance")
-            )
+    def write(self, vals):
+        # The date of the move lines follows the one of their move
+        if {"date", "company_id"} & set(vals):
+            self.env["account.tax"]._clear_tax_ids_with_moves_cache()
+        return super().write(vals)
 
-        for move in self:
-            account_types = move.line_ids.mapped("account_id.account_type")
-            if (
-                "asset_cash" in account_types
-                or "liability_credit_card" in account_types
+    @api.model
+    def _get_financial_type(self, balances):
+        """Return the financial type of a move from the balances of its
+        lines summed by account type."""
+        for financial_type, account_type, balance_operator in FINANCIAL_TYPE_MAPPING:
+            if not account_type:
+                return financial_type
+            if account_type in balances and (
+                not balance_operator
+                or BALANCE_OPERATORS[balance_operator](balances[account_type], 0)
             ):
-                move.financial_type = "liquidity"
-            elif "liability_payable" in account_types:
-                balance = _balance_get(move.line_ids, "liability_payable")
-                move.financial_type = "payable" if balance < 0 else "payable_refund"
-            elif "asset_receivable" in account_types:
-                balance = _balance_get(move.line_ids, "asset_receivable")
-                move.financial_type = (
-                    "receivable" if balance > 0 else "receivable_refund"
+                return financial_type
+
+    def _get_financial_type_balances(self):
+        """Return the balances of the lines of the moves summed by account
+        type, keyed by move id, read in one query."""
+        balances = {move_id: {} for move_id in self.ids}
+        self.env["account.move.line"].flush_model(["move_id", "account_id", "balance"])
+        self.env["account.account"].flush_model(["account_type"])
+        self.env.cr.execute(
+            """
+            SELECT aml.move_id, aa.account_type, SUM(aml.balance)
+            FROM account_move_line aml
+            JOIN account_account aa ON aa.id = aml.account_id
+            WHERE aml.move_id IN %s
+            GROUP BY aml.move_id, aa.account_type
+            """,
+            (tuple(self.ids),),
+        )
+        for move_id, account_type, balance in self.env.cr.fetchall():
+            balances[move_id][account_type] = balance
+        return balances
+
+    @api.depends("line_ids.account_id.account_type", "line_ids.balance")
+    def _compute_financial_type(self):
+        # The lines of the moves being edited are only in the cache
+        stored = self.filtered(lambda move: isinstance(move.id, int))
+        balances = stored._get_financial_type_balances() if stored else {}
+        for move in self - stored:
+            move_balances = balances[move.id] = {}
+            for line in move.line_ids:
+                account_type = line.account_id.account_type
+                move_balances[account_type] = (
+                    move_balances.get(account_type, 0.0) + line.balance
                 )
-            else:
-                move.financial_type = "other"
+        for move in self:
+            move.financial_type = self._get_financial_type(balances[move.id])
@@ -1,7 +1,10 @@
 # Copyright 2017 ACSONE SA/NV
 # License AGPL-3.0 or later (http://www.gnu.org/licenses/agpl).
 
-from odoo import models
+from odoo import api, models
+
+# Fields of the journal item that tell whether a tax has moves in a period
+TAX_MOVES_FIELDS = {"date", "company_id", "tax_line_id", "tax_ids"}
 
 
 class AccountMoveLine(models.Model):
@@ -24,3 +27,17 @@ class AccountMoveLine(models.Model):
             """
             )
         return res
+
+    @api.model_create_multi
+    def create(self, vals_list):
+        self.env["account.tax"]._clear_tax_ids_with_moves_cache()
+        return super().create(vals_list)
+
+    def write(self, vals):
+        if TAX_MOVES_FIELDS & set(vals):
+            self.env["account.tax"]._clear_tax_ids_with_moves_cache()
+        return super().write(vals)
+
+    def unlink(self):
+        self.env["account.tax"]._clear_tax_ids_with_moves_cache()
+        return super().unlink()
@@ -32,39 +32,53 @@ class AccountTax(models.Model):
             context.get("target_move", "posted"),
         )
 
-    def _account_tax_ids_with_moves(self):
-        """Return all account.tax ids for which there is at least
-        one account.move.line in the context period
-        for the user company.
+    def _get_taxes_has_moves(self):
+        """Return whether each account.tax of the context companies has at
+        least one account.move.line in the context period, keyed by tax id.
 
         Caveat: this ignores record rules and ACL but it is good
         enough for filtering taxes with activity during the period.
         """
         from_date, to_date, company_ids, _ = self.get_context_values()
         company_ids = tuple(company_ids)
+        self.env["account.move.line"].flush_model(
+            ["date", "company_id", "tax_line_id", "tax_ids"]
+        )
+        self.flush_model(["company_id"])
         req = """
-            SELECT id
-            FROM account_tax at
-            WHERE
-            company_id in %s AND
-            EXISTS (
-              SELECT 1 FROM account_move_Line aml
-              WHERE
-                date >= %s AND
-                date <= %s AND
-                company_id in %s AND (
-                  tax_line_id = at.id OR
-                  EXISTS (
-                    SELECT 1 FROM account_move_line_account_tax_rel
-                    WHERE account_move_line_id = aml.id AND
-                      account_tax_id = at.id
-                  )
-                )
+            SELECT id, id IN (
+                SELECT tax_line_id FROM account_move_line
+                WHERE date >= %s AND date <= %s AND company_id IN %s
+                    AND tax_line_id IS NOT NULL
+                UNION
+                SELECT rel.account_tax_id
+                FROM account_move_line aml
+                JOIN account_move_line_account_tax_rel rel
+                    ON rel.account_move_line_id = aml.id
+                WHERE aml.date >= %s AND aml.date <= %s
+                    AND aml.company_id IN %s
             )
+            FROM account_tax
+            WHERE company_id IN %s
         """
-        self.env.cr.execute(req, (company_ids, from_date, to_date, company_ids))
-        return [r[0] for r in self.env.cr.fetchall()]
+        self.env.cr.execute(req, (from_date, to_date, company_ids) * 2 + (company_ids,))
+        return dict(self.env.cr.fetchall())
+
+    def _account_tax_ids_with_moves(self):
+        """Return all account.tax ids for which there is at least
+        one account.move.line in the context period
+        for the user company."""
+        return [
+            tax_id
+            for tax_id, has_moves in self._get_taxes_has_moves().items()
+            if has_moves
+        ]
 
+    @api.model
+    def _clear_tax_ids_with_moves_cache(self):
+        self.invalidate_model(["has_moves"])
+
+    @api.depends_context("from_date", "to_date", "company_ids")
     def _compute_has_moves(self):
         ids_with_moves = set(self._account_tax_ids_with_moves())
         for tax in self:
@@ -78,8 +92,18 @@ class AccountTax(models.Model):
     def _search_has_moves(self, operator, value):
         if self._is_unsupported_search_operator(operator) or not value:
             raise ValueError(_("Unsupported search operator"))
-        ids_with_moves = self._account_tax_ids_with_moves()
-        return [("id", "in", ids_with_moves)]
+        taxes_has_moves = self._get_taxes_has_moves()
+        # Reading has_moves on the taxes found costs no other query. Like
+        # any value of the cache, it goes on commit, rollback, rollback to
+        # a savepoint and change of the move lines.
+        self.env.cache.update(
+            self.browse(list(taxes_has_moves)),
+            self._fields["has_moves"],
+            list(taxes_has_moves.values()),
+        )
+        return [
+            ("id", "in", [tax_id for tax_id, has in taxes_has_moves.items() if has])
+        ]
 
     @api.depends_context(
         "from_date",
@@ -88,22 +112,70 @@ class AccountTax(models.Model):
         "target_move",
     )
     def _compute_balance(self):
+        balances = self._get_balances()
         for tax in self:
-            tax.balance_regular = tax.compute_balance(
-                tax_or_base="tax", financial_type="regular"
-            )
-            tax.base_balance_regular = tax.compute_balance(
-                tax_or_base="base", financial_type="regular"
-            )
-            tax.balance_refund = tax.compute_balance(
-                tax_or_base="tax", financial_type="refund"
-            )
-            tax.base_balance_refund = tax.compute_balance(
-                tax_or_base="base", financial_type="refund"
-            )
+            tax_balances = balances.get(tax._origin.id, {})
+            tax.balance_regular = tax_balances.get(("tax", "regular"), 0.0)
+            tax.base_balance_regular = tax_balances.get(("base", "regular"), 0.0)
+            tax.balance_refund = tax_balances.get(("tax", "refund"), 0.0)
+            tax.base_balance_refund = tax_balances.get(("base", "refund"), 0.0)
             tax.balance = tax.balance_regular + tax.balance_refund
             tax.base_balance = tax.base_balance_regular + tax.base_balance_refund
 
+    def _get_balances(self):
+        """Return the tax and base balances of all the taxes at once.
+
+        A single pass over the move lines of
+        ``get_all_taxes_move_lines_domain`` sums them by tax (``tax_line_id``
+        for the tax lines, ``tax_ids`` for the base lines) and by financial
+        type of their move. The result maps each tax id to a dict keyed by
+        ``(tax_or_base, financial_type)`` tuples, with the same sign as
+        ``compute_balance``.
+        """
+        tax_ids = tuple(self._origin.ids)
+        if not tax_ids:
+            return {}
+        self.env["account.move"].flush_model(["financial_type", "state"])
+        self.env["account.move.line"].flush_model()
+        query = self.env["account.move.line"]._search(
+            self.get_all_taxes_move_lines_domain()
+        )
+        from_clause, where_clause, where_params = query.get_sql()
+        req = """
+            SELECT 'tax', "account_move_line".tax_line_id, am.financial_type,
+                SUM("account_move_line".balance)
+            FROM {from_clause}
+            JOIN account_move am ON am.id = "account_move_line".move_id
+            WHERE {where_clause} AND "account_move_line".tax_line_id IN %s
+            GROUP BY 2, 3
+            UNION ALL
+            SELECT 'base', rel.account_tax_id, am.financial_type,
+                SUM("account_move_line".balance)
+            FROM {from_clause}
+            JOIN account_move am ON am.id = "account_move_line".move_id
+            JOIN account_move_line_account_tax_rel rel
+                ON rel.account_move_line_id = "account_move_line".id
+            WHERE {where_clause} AND rel.account_tax_id IN %s
+            GROUP BY 2, 3
+        """.format(
+            from_clause=from_clause, where_clause=where_clause
+        )
+        self.env.cr.execute(req, (where_params + [tax_ids]) * 2)
+        type_keys = {}
+        for financial_type in ["regular", "refund"]:
+            for move_type in self.get_target_type_list(financial_type):
+                type_keys[move_type] = financial_type
+        balances = {}
+        for tax_or_base, tax_id, move_type, balance in self.env.cr.fetchall():
+            if move_type not in type_keys or not balance:
+                continue
+            key = (tax_or_base, type_keys[move_type])
+            tax_balances = balances.setdefault(tax_id, {})
+            # VAT on sales (credit) - VAT on purchases (debit), as in
+            # compute_balance
+            tax_balances[key] = tax_balances.get(key, 0.0) - balance
+        return balances
+
     def get_target_type_list(self, financial_type=None):
         if financial_type == "refund":
             return ["receivable_refund", "payable_refund"]
@@ -141,24 +213,23 @@ class AccountTax(models.Model):
         ]
         return balance and -balance or 0
 
-    def get_balance_domain(self, state_list, type_list):
-        domain = [
-            ("move_id.state", "in", state_list),
-            ("tax_line_id", "=", self.id),
-        ]
+    def get_balance_common_domain(self, state_list, type_list):
+        """Return the part of the balance domains that does not depend on
+        the tax."""
+        domain = [("move_id.state", "in", state_list)]
         domain.extend(self.env["account.move.line"]._get_tax_exigible_domain())
         if type_list:
             domain.append(("move_id.financial_type", "in", type_list))
         return domain
 
+    def get_balance_domain(self, state_list, type_list):
+        domain = [("tax_line_id", "=", self.id)]
+        domain.extend(self.get_balance_common_domain(state_list, type_list))
+        return domain
+
     def get_base_balance_domain(self, state_list, type_list):
-        domain = [
-            ("move_id.state", "in", state_list),
-            ("tax_ids", "in", self.id),
-        ]
-        domain.extend(self.env["account.move.line"]._get_tax_exigible_domain())
-        if type_list:
-            domain.append(("move_id.financial_type", "in", type_list))
+        domain = [("tax_ids", "in", self.id)]
+        domain.extend(self.get_balance_common_domain(state_list, type_list))
         return domain
 
     def get_move_lines_domain(self, tax_or_base="tax", financial_type=None):
@@ -174,6 +245,15 @@ class AccountTax(models.Model):
         domain.extend(balance_domain)
         return domain
 
+    def get_all_taxes_move_lines_domain(self):
+        """Return the domain of the move lines of all the taxes and financial
+        types of the context period, as summed by _get_balances."""
+        from_date, to_date, company_ids, target_move = self.get_context_values()
+        state_list = self.get_target_state_list(target_move)
+        domain = self.get_move_line_partial_domain(from_date, to_date, company_ids)
+        domain.extend(self.get_balance_common_domain(state_list, []))
+        return domain
+
     def get_lines_action(self, tax_or_base="tax", financial_type=None):
         domain = self.get_move_lines_domain(
             tax_or_base=tax_or_base, financial_type=financial_type
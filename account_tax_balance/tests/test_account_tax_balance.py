@@ -9,6 +9,7 @@ from dateutil.rrule import MONTHLY
 
 import odoo
 from odoo import fields
+from odoo.exceptions import UserError
 from odoo.fields import Date
 from odoo.tests.common import Form, HttpCase
 
@@ -272,3 +273,75 @@ class TestInvoicingBalance(AccountTestInvoicingCommon):
             to_date=date,
         )
         self.assertEqual(tax.balance, balance)
+
+    def test_financial_type(self):
+        """Check the financial type computed for the moves of a batch."""
+        moves = self.env["account.move"]
+        for move_type in ["out_invoice", "out_refund", "in_invoice", "in_refund"]:
+            moves |= self.init_invoice(move_type, amounts=[100], post=True)
+        moves.invalidate_recordset(["financial_type"])
+        moves._compute_financial_type()
+        self.assertEqual(
+            moves.mapped("financial_type"),
+            ["receivable", "receivable_refund", "payable", "payable_refund"],
+        )
+
+    def test_has_moves_cache(self):
+        """Check that the taxes with moves are read once until a move line
+        changes or a savepoint is rolled back."""
+        tax_model = self.env["account.tax"].with_context(
+            from_date=fields.Date.today(), to_date=fields.Date.today()
+        )
+        self.assertNotIn(self.tax_sale_a, tax_model.search([("has_moves", "=", True)]))
+        with self.assertQueryCount(0):
+            self.assertFalse(tax_model.browse(self.tax_sale_a.id).has_moves)
+        self.init_invoice(
+            "out_invoice",
+            invoice_date=fields.Date.today(),
+            post=True,
+            amounts=[100],
+            taxes=self.tax_sale_a,
+        )
+        self.assertTrue(tax_model.browse(self.tax_sale_a.id).has_moves)
+        with self.assertRaises(UserError), self.env.cr.savepoint():
+            self.init_invoice(
+                "out_invoice",
+                invoice_date=fields.Date.today(),
+                post=True,
+                amounts=[100],
+                taxes=self.tax_sale_b,
+            )
+            self.assertIn(self.tax_sale_b, tax_model.search([("has_moves", "=", True)]))
+            raise UserError("Rollback")
+        self.assertFalse(tax_model.browse(self.tax_sale_b.id).has_moves)
+
+    def test_balances_of_all_taxes(self):
+        """Check that the balances of several taxes read at once are the
+        ones computed tax by tax."""
+        today = fields.Date.today()
+        taxes = self.tax_sale_a | self.tax_sale_b
+        for move_type, amounts in [
+            ("out_invoice", [100, 200]),
+            ("out_refund", [50]),
+            ("in_invoice", [300]),
+        ]:
+            self.init_invoice(
+                move_type,
+                invoice_date=today,
+                post=True,
+                amounts=amounts,
+                taxes=taxes,
+            )
+        taxes = taxes.with_context(from_date=today, to_date=today)
+        balances = taxes._get_balances()
+        for tax in taxes:
+            for tax_or_base in ["tax", "base"]:
+                for financial_type in ["regular", "refund"]:
+                    self.assertAlmostEqual(
+                        balances.get(tax.id, {}).get(
+                            (tax_or_base, financial_type), 0.0
+                        ),
+                        tax.compute_balance(tax_or_base, financial_type),
+                    )
+            self.assertNotEqual(tax.balance_regular, 0.0)
+            self.assertNotEqual(tax.balance_refund, 0.0)